@@ -1,189 +1,625 @@
 #!/usr/bin/python
 
 import sqlite3
-from itertools import combinations
+from itertools import combinations, izip, repeat
 import operator
 from tabulate import tabulate
-import sys
-from contextlib import contextmanager
-from dataloader import createDatabase
-
-### Helpful decorator to redirect output to file
-@contextmanager
-def stdout_redirected(new_stdout):
-    save_stdout = sys.stdout
-    sys.stdout = new_stdout
-    try:
-        yield None
-    finally:
-        sys.stdout = save_stdout
+import time
+import argparse
+from dataloader import createDatabase, loadSchema, inferSchema, prepareDatabase, appendFile, tableMatches, batches
+from counters import BitmapCounter, ScanCounter, ParallelCounter
+from fpgrowth import fpgrowth
+from eclat import eclat
+from son import son
+from topk import topk
+from closed import charm, ClosedSets
+from measures import MEASURES, TITLES, computeMeasures
+from columnar import ColumnarStore, isCurrent
+from incremental import IncrementalMiner, readState
+from results import ResultStore, fingerprint
+from writers import WRITERS
+
+# in-memory counting engines that can replace the per-itemset sql queries
+ENGINES = {"bitmap": BitmapCounter, "scan": ScanCounter, "parallel": ParallelCounter}
+
+# algorithms that can be used to mine the frequent itemsets
+MINERS = ("apriori", "fpgrowth", "eclat", "son")
+
+# kinds of frequent itemsets that can be kept, with their title in the output
+ITEMSETS = {"all": "Frequent", "closed": "Closed frequent", "maximal": "Maximal frequent"}
+
+# uses of the tables built by dataloader.prepareDatabase: reading the item ids from
+# its dictionary, ignoring the tables, or also counting the itemsets missing from the
+# support cache by intersecting tids in its (item, tid) index
+PREPARED = ("dictionary", "ignore", "intersect")
+
+# rules whose interestingness measures are computed at once
+RULE_BATCH = 10000
+
+# columns of the itemsets and of the rules in the streamed output formats
+ITEMSET_COLUMNS = [("items", str), ("count", int), ("support", float)]
+RULE_COLUMNS = [("lhs", str), ("rhs", str), ("confidence", float), ("support", float)]
 
 class Apriori(object):
     """ The Apriori class that implements the apiori algorithm for
     mining association rules from a database
     """
-    def __init__(self, dbfile, dbname, categories, threshold, confidence):
+    def __init__(self, dbfile, dbname, categories, threshold, confidence, engine="sql",
+                 miner="apriori", diffsets=False, memoryLimit=None, workers=None,
+                 chunkSize=100000, columnar=None, itemsets="all", consequents=1, measures=(),
+                 minMeasures=None, prepared="dictionary"):
         self.conn = sqlite3.connect(dbfile)
+        self.cursor = self.conn.cursor()
+        self.statements = {}
+        self.dbfile = dbfile
+        self.queries = 0
         self.dbname = dbname
         self.columns = categories
-        self.categoryMap, self.valueMap = self.initMapping()
+        self.store = self.openColumnar(columnar)
+        if prepared not in PREPARED:
+            raise ValueError("Unknown prepared %r, expected one of %s" % (prepared, ", ".join(PREPARED)))
+        self.prepared = self.store is None and prepared != "ignore" and self.detectPreparedLayout()
+        self.intersect = self.prepared and prepared == "intersect"
+        # seconds taken by the costly steps of the constructor
+        self.timings = {}
+        start = time.time()
+        self.items, self.itemIds = self.initMapping()
+        self.timings["initMapping"] = time.time() - start
         self.threshold = threshold
         self.frequentSets = {}
-        self.totalSize = self.runFetchOne("select count(*) from %s" % self.dbname)[0]
+        if self.store is not None:
+            self.totalSize = self.store.rows
+        else:
+            self.totalSize = self.runFetchOne("select count(*) from %s" % self.dbname)[0]
         self.support = int(threshold * self.totalSize)
         self.confidence = confidence
+        self.consequents = consequents
+        self.minMeasures = minMeasures or {}
+        # the measures computed for the output and for the thresholds, in output order
+        self.measures = [m for m in MEASURES if m in measures or m in self.minMeasures]
+        for m in set(measures) | set(self.minMeasures):
+            if m not in MEASURES:
+                raise ValueError("Unknown measure %r, expected one of %s" % (m, ", ".join(MEASURES)))
         self.assocrules = []
+        self.ruleMeasures = []
+        self.levelStats = []
+        self.supportCache = {}
+        self.cacheHits, self.cacheMisses = 0, 0
+        self.workers = workers
+        start = time.time()
+        self.counter = self.initEngine(engine)
+        self.timings["loadEngine"] = time.time() - start
+        if miner not in MINERS:
+            raise ValueError("Unknown miner %r, expected one of %s" % (miner, ", ".join(MINERS)))
+        self.miner = miner
+        self.diffsets = diffsets
+        self.memoryLimit = memoryLimit
+        self.chunkSize = chunkSize
+        if itemsets not in ITEMSETS:
+            raise ValueError("Unknown itemsets %r, expected one of %s" % (itemsets, ", ".join(sorted(ITEMSETS))))
+        self.itemsets = itemsets
+        self.closedSets = None
+
+    def initEngine(self, engine):
+        # returns the in-memory counting engine, or None when support is
+        # counted with a sql query per itemset
+        if engine == "sql":
+            return None
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine %r, expected one of %s"
+                             % (engine, ", ".join(["sql"] + sorted(ENGINES))))
+        return ENGINES[engine](self)
+
+    def openColumnar(self, path):
+        # opens the columnar cache written by dataloader.createDatabase, which then
+        # replaces sqlite as the source of the item dictionary and transactions
+        if path is None:
+            return None
+        store = ColumnarStore(path)
+        if store.table != self.dbname or list(store.columns) != list(self.columns):
+            raise ValueError("%s caches columns %s of %s" % (path, ", ".join(store.columns), store.table))
+        return store
+
+    def detectPreparedLayout(self):
+        # checks for the item tables built by dataloader.prepareDatabase, they are
+        # used when their dictionary covers exactly the mined columns, in order
+        tables = set(r[0] for r in self.runFetchAll("select name from sqlite_master where type = 'table'"))
+        if not set([self.dbname + "_items", self.dbname + "_dictionary"]) <= tables:
+            return False
+        columns = self.runFetchAll("select col from %s_dictionary group by col order by min(item)"
+                                   % self.dbname)
+        return [r[0] for r in columns] == list(self.columns)
 
     def initMapping(self):
-        # builds the mapping of fields to columns and vice-versa to help with faster
-        # lookups in the rest of the algorithm
-        categoryMap, valueMap = {}, {}
+        # dictionary-encodes every (column, value) pair into a dense integer id, the
+        # rest of the algorithm works on ids and only decodes them for the output.
+        # ids are handed out column by column so that encoded rows come out sorted
+        if self.store is not None:
+            return self.store.items, dict((item, i) for i, item in enumerate(self.store.items))
+        if self.prepared:
+            items = self.runFetchAll("select col, value from %s_dictionary order by item" % self.dbname)
+            return items, dict((item, i) for i, item in enumerate(items))
+        items = []
         for col in self.columns:
             values = self.runFetchAll("select distinct %s from %s" % (col, self.dbname))
-            categoryMap[col] = set([x[0] for x in values])
-        for k, values in categoryMap.iteritems():
-            for v in values:
-                valueMap[v] = k
-        return categoryMap, valueMap
+            items.extend(sorted((col, x[0]) for x in values if x[0] is not None))
+        itemIds = dict((item, i) for i, item in enumerate(items))
+        return items, itemIds
 
-    def runFetchAll(self, query):
-        # utility method for running a query against the sqlite database
+    def encodeRow(self, row):
+        # returns the sorted tuple of item ids of a row of categorical columns
+        return tuple(self.itemIds[(col, v)] for col, v in zip(self.columns, row) if v is not None)
+
+    def loadTransactions(self):
+        # fetches the encoded categorical columns of every row in the table
+        if self.store is not None:
+            return list(self.store.iterRows())
+        rows = self.runFetchAll("select %s from %s" % (", ".join(self.columns), self.dbname))
+        return map(self.encodeRow, rows)
+
+    def iterTransactions(self):
+        # streams the encoded categorical columns of every row in the table, on a
+        # cursor of its own so that other queries can run while it is consumed
+        if self.store is not None:
+            for row in self.store.iterRows():
+                yield row
+            return
+        self.queries += 1
         c = self.conn.cursor()
-        return c.execute(query).fetchall()
+        for row in c.execute("select %s from %s" % (", ".join(self.columns), self.dbname)):
+            yield self.encodeRow(row)
 
-    def runFetchOne(self, query):
+    def runFetchAll(self, query, params=()):
         # utility method for running a query against the sqlite database
-        c = self.conn.cursor()
-        return c.execute(query).fetchone()
+        self.queries += 1
+        return self.cursor.execute(query, params).fetchall()
+
+    def runFetchOne(self, query, params=()):
+        # utility method for running a query against the sqlite database
+        self.queries += 1
+        return self.cursor.execute(query, params).fetchone()
 
     def getFrequentItemSets(self, candidateSets):
         # generates the frequent item set for the current candidate set
-        # From the paper, this returns Ln for Cn
-        frequentSets = []
-        for s in candidateSets:
-            count = self.getCount(tuple(s))[0]
+        # From the paper, this returns Ln for Cn, mapped to the support counts
+        frequentSets = {}
+        for s, count in zip(candidateSets, self.countCandidates(candidateSets)):
+            self.supportCache[frozenset(s)] = count
             if count >= self.support:
-                frequentSets.append(s)
+                frequentSets[tuple(s)] = count
         return frequentSets
 
-    def convertToSet(self, iterable):
-        # utility function for reducing over an iterable of sets
-        return reduce(lambda x, y: x.union(y), iterable)
+    def countCandidates(self, candidateSets):
+        # returns the support counts of all the candidates of a level, in order
+        if self.counter is not None:
+            return self.counter.countCandidates(candidateSets)
+        return self.groupCount(candidateSets)
+
+    def groupCount(self, candidateSets):
+        # counts all the candidates of a level on the sql backend with a single
+        # group by query per distinct combination of columns among the candidates
+        byColumns = {}
+        for s in candidateSets:
+            columns = tuple(self.items[v][0] for v in sorted(s))
+            byColumns.setdefault(columns, []).append(s)
+        counts = {}
+        for columns in byColumns:
+            rows = self.runFetchAll(self.generateGroupQuery(columns))
+            for row in rows:
+                counts[tuple(zip(columns, row[:-1]))] = row[-1]
+        return [counts.get(tuple(self.items[v] for v in sorted(s)), 0) for s in candidateSets]
 
     def hasUniqueCategories(self, values):
         # utility method to check if a list of values all belong to the same column
-        return len(values) == len(set([self.valueMap[v] for v in values]))
+        return len(values) == len(set([self.items[v][0] for v in values]))
 
     def getNextCandidates(self, candidates, size=2):
         """
         Algorithm: As explained in section 2.2.1
         JOIN STEP:
-            1. Generate all 2-combinations of Ln-1
-            2. Merge these sets together
-            3. Validate these if these are of the correct size
-               and do not have multiple entries of the same column
-            4. Return all the valid ones
+            1. Sort the items of every set in Ln-1, and sort the sets
+            2. Join the pairs of sets that share their first n-2 items,
+               these are adjacent after sorting
+            3. Validate that the two differing items do not belong to
+               the same column
+            4. Return all the valid ones, as sorted tuples
         PRUNE STEP:
             1. For each the valid subsets of size n
             2. Generate all subsets of size n - 1
             3. If ANY of these subsets are NOT in Ln-1, reject this set
         """
-        possibleCombs = map(self.convertToSet, combinations(candidates, 2))
-        validSets = [c for c in possibleCombs if self.hasUniqueCategories(c) and len(c) == size]
+        frequent = sorted(set(tuple(sorted(c)) for c in candidates))
+        lookup = set(map(frozenset, frequent))
         newCandidates = []
-        for s in validSets: # s is a set
-            subsets = combinations(s, len(s)-1)
-            isValid = True
-            for x in subsets:
-                if set(x) not in candidates:
-                    isValid = False
+        for i, first in enumerate(frequent):
+            for second in frequent[i+1:]:
+                if first[:-1] != second[:-1]:
+                    break
+                if not self.hasUniqueCategories((first[-1], second[-1])):
                     continue
-            if isValid and s not in newCandidates:
-                newCandidates.append(s)
+                s = first + (second[-1],)
+                if all(frozenset(x) in lookup for x in combinations(s, size-1)):
+                    newCandidates.append(s)
         return newCandidates
 
     def getCount(self, values):
-        # returns the count of a n-ary tuple e.g. getCount(("A2", "B3"))
-        m = {} # build the mapping 
-        for v in values:
-            for cat, items in self.categoryMap.iteritems():
-                if v in items:
-                    m[cat] = v
-        query = self.generateQuery(**m)
-        return self.runFetchOne(query)
-
-    def generateQuery(self, **kwargs):
-        # utility method that generates a SQL query based on the keyword arguments provided
-        clause = " and ".join(["%s = '%s'" % (k, v) for (k, v) in kwargs.iteritems()])
-        return "select count(*) from %s where %s" % (self.dbname, clause)
+        # returns the count of a n-ary tuple of item ids e.g. getCount((0, 7)), itemsets
+        # that were counted before are answered from the support cache
+        key = frozenset(values)
+        if key in self.supportCache:
+            self.cacheHits += 1
+            return (self.supportCache[key],)
+        self.cacheMisses += 1
+        if self.closedSets is not None:
+            count = self.closedSets.count(values)
+        elif self.counter is not None:
+            count = self.counter.count(values)
+        elif self.intersect:
+            count = self.runFetchOne(self.generateItemQuery(len(values)), tuple(values))[0]
+        else:
+            m = dict(self.items[v] for v in values) # build the mapping
+            columns = tuple(sorted(m))
+            count = self.runFetchOne(self.generateQuery(columns), [m[c] for c in columns])[0]
+        self.supportCache[key] = count
+        return (count,)
+
+    def close(self):
+        # stops the worker processes of the counting engine, if any, and closes
+        # the database connection once mining and output are done
+        if hasattr(self.counter, "close"):
+            self.counter.close()
+        self.conn.close()
+
+    def cacheStats(self):
+        # returns the hit and miss counters of the support cache
+        return {"hits": self.cacheHits, "misses": self.cacheMisses,
+                "size": len(self.supportCache)}
+
+    def generateQuery(self, columns):
+        # utility method that generates a SQL query counting the rows matching values
+        # of a tuple of columns, which are bound as parameters. The templates are
+        # cached so that sqlite parses and plans each statement once
+        key = ("count",) + columns
+        if key not in self.statements:
+            clause = " and ".join(["%s = ?" % c for c in columns])
+            self.statements[key] = "select count(*) from %s where %s" % (self.dbname, clause)
+        return self.statements[key]
+
+    def generateGroupQuery(self, columns):
+        # utility method that generates a SQL query counting the rows per combination
+        # of values of a tuple of columns
+        key = ("group",) + columns
+        if key not in self.statements:
+            clause = ", ".join(columns)
+            self.statements[key] = "select %s, count(*) from %s group by %s" % (clause, self.dbname, clause)
+        return self.statements[key]
+
+    def generateItemQuery(self, size):
+        # utility method that generates a SQL query intersecting the tids of size items
+        # in the prepared (tid, item) table, answered from its covering index
+        key = ("items", size)
+        if key not in self.statements:
+            clause = " intersect ".join(["select tid from %s_items where item = ?" % self.dbname] * size)
+            self.statements[key] = "select count(*) from (%s)" % clause
+        return self.statements[key]
 
     def generateFrequentItemSets(self):
         # generates all sets of frequent itemsets from the dataset
-        candidateSet = map(lambda x: set([x]), self.valueMap.keys())
+        if self.itemsets != "all":
+            return self.generateClosedItemSets()
+        if self.miner == "fpgrowth":
+            return self.generateFPGrowthItemSets()
+        if self.miner == "eclat":
+            return self.generateEclatItemSets()
+        if self.miner == "son":
+            return self.generateSONItemSets()
+        candidateSet = [(v,) for v in range(len(self.items))]
         currentSize = 2
         while len(candidateSet):
+            queries, start = self.queries, time.time()
             frequentSet = self.getFrequentItemSets(candidateSet)
-            for s in frequentSet:
-                t = tuple(s)
-                self.frequentSets[t] = self.getCount(t)[0]
-            candidateSet = self.getNextCandidates(frequentSet, currentSize)
+            self.frequentSets.update(frequentSet)
+            nextSet = self.getNextCandidates(frequentSet.keys(), currentSize)
+            # the level, its candidates, the queries and the seconds taken to count them and join the next ones
+            self.levelStats.append((currentSize - 1, len(candidateSet), self.queries - queries,
+                                    time.time() - start))
+            candidateSet = nextSet
             currentSize += 1
 
+    def generateFPGrowthItemSets(self):
+        # mines the frequent itemsets from an FP-tree built in two table scans
+        self.addFrequentItemSets(fpgrowth(self.iterTransactions, max(self.support, 1)))
+
+    def generateEclatItemSets(self):
+        # mines the frequent itemsets depth-first from the item bitmaps
+        counter = self.counter if isinstance(self.counter, BitmapCounter) else BitmapCounter(self)
+        self.addFrequentItemSets(eclat(counter.bitmaps, max(self.support, 1),
+                                       self.diffsets, self.memoryLimit))
+
+    def generateSONItemSets(self):
+        # mines the frequent itemsets chunk by chunk, without loading the whole table
+        self.addFrequentItemSets(son(self.dbfile, self.dbname, self.columns, self.itemIds,
+                                     self.support, self.chunkSize, self.workers))
+
+    def generateClosedItemSets(self):
+        # mines the closed itemsets from the item bitmaps and keeps them, or the
+        # maximal ones, the counts of the other frequent itemsets are derived from them
+        counter = self.counter if isinstance(self.counter, BitmapCounter) else BitmapCounter(self)
+        self.closedSets = ClosedSets(charm(counter.bitmaps, max(self.support, 1)))
+        if self.itemsets == "maximal":
+            self.addFrequentItemSets(self.closedSets.maximal())
+        else:
+            self.addFrequentItemSets(self.closedSets.closed)
+
+    def generateTopItemSets(self, k, rules=False):
+        # mines the k most frequent itemsets, or the itemsets of the k most frequent
+        # rules above the confidence, and lowers the support to the bound reached
+        counter = self.counter if isinstance(self.counter, BitmapCounter) else BitmapCounter(self)
+        frequentSets, self.support = topk(counter.bitmaps, k, self.confidence if rules else None)
+        self.threshold = float(self.support) / self.totalSize
+        self.addFrequentItemSets(frequentSets)
+
+    def addFrequentItemSets(self, frequentSets):
+        # records the itemsets found by a miner along with their counts
+        for s, count in frequentSets.iteritems():
+            self.supportCache[frozenset(s)] = count
+        self.frequentSets.update(frequentSets)
+
     def getSupportForRule(self, lhs, rhs):
         """ utility method that computes the support and confidence
         for a association rule lhs => rhs """
         s1 = self.getCount(tuple(lhs))[0]
-        s2 = self.getCount(tuple(list(lhs) + [rhs]))[0]
+        s2 = self.getCount(tuple(lhs) + tuple(rhs))[0]
         return float(s2)/s1, float(s2)/self.totalSize
 
     def getReadableContent(self, value):
         # utility missed to get a readable value of a value
-        return self.valueMap[value] + " = " + value[0]
+        return "%s = %s" % self.items[value]
 
     def buildAssociationRules(self):
         # the primary workhorse method that generates the association rules
-        candidates = filter(lambda x: len(x) > 1, self.frequentSets.keys())
-        for candidate in candidates:
-            for x in candidate:
-                c = set(candidate)
-                lhs, rhs = c.difference(set([x])), x
-                conf, supp = self.getSupportForRule(lhs, rhs)
-                if conf > self.confidence:
-                    self.assocrules.append((lhs, rhs, conf, supp))
+        self.addAssociationRules(self.iterAssociationRules())
+
+    def addAssociationRules(self, rules):
+        # keeps the rules above the thresholds on the interestingness measures
+        if not self.measures:
+            self.assocrules.extend(rules)
+            return
+        for rule, values in self.measureRules(rules):
+            self.assocrules.append(rule)
+            self.ruleMeasures.append(values)
+
+    def measureRules(self, rules):
+        # streams the rules above the thresholds on the interestingness measures,
+        # which are computed a batch of rules at a time, along with their values
+        if not self.measures:
+            for rule in rules:
+                yield rule, ()
+            return
+        for batch in batches(iter(rules), RULE_BATCH):
+            counts = [(self.getCount(lhs + rhs)[0], self.getCount(lhs)[0], self.getCount(rhs)[0],
+                       max(self.getCount((v,))[0] for v in lhs + rhs)) for lhs, rhs, _, _ in batch]
+            for rule, values in zip(batch, computeMeasures(self.measures, counts, self.totalSize)):
+                if all(v > self.minMeasures[m] for m, v in zip(self.measures, values) if m in self.minMeasures):
+                    yield rule, values
+
+    def iterAssociationRules(self):
+        """
+        Algorithm: ap-genrules, from section 3 of the Agrawal and Srikant paper
+            1. For every frequent itemset, start with the consequents of 1 item
+            2. Keep the consequents whose rule is above the confidence and
+               yield these rules
+            3. Join the kept consequents into consequents one item larger, as
+               in getNextCandidates. A rule can only lose confidence when items
+               move from its lhs to its rhs, so nothing else can pass
+            4. Stop when the lhs would be empty, or at self.consequents items
+        The counts all come from the support cache filled while mining
+        """
+        total = float(self.totalSize)
+        for candidate, count in self.frequentSets.iteritems():
+            consequents = [(x,) for x in candidate]
+            size = 1
+            while consequents and size < len(candidate) and size <= self.consequents:
+                kept = []
+                for rhs in consequents:
+                    lhs = tuple(v for v in candidate if v not in rhs)
+                    conf = float(count) / self.getCount(lhs)[0]
+                    if conf > self.confidence:
+                        kept.append(rhs)
+                        yield lhs, rhs, conf, count / total
+                size += 1
+                consequents = self.getNextCandidates(kept, size)
 
     def generateOutput(self, output_file):
         """ pretty prints the frequent itemsets and association mining rules
             in the output file """
         with open(output_file, "w") as f:
-            with stdout_redirected(f):
-                print "==Frequent itemsets (min_sup=%.2f%%)" % (100 * self.threshold)
-                sortedSets = sorted(self.frequentSets.items(), key=operator.itemgetter(1), reverse=True)
-                table = ((",".join(map(self.getReadableContent, s)), count, '%.2f%%' % (count*100/float(self.totalSize))) for s, count in sortedSets)
-                print tabulate(table, headers=["ItemSets", "Count", "Support"], tablefmt="grid")
-
-                print "\n\n==High-confidence association rules (min_conf=%.2f%%)" % (100 * self.confidence)
-                sortedRules = sorted(self.assocrules, key=operator.itemgetter(2), reverse=True)
-                table = []
-                for lhs, rhs, conf, supp in sortedRules:
-                    l = map(self.getReadableContent, lhs)
-                    table.append((",".join(l), "=>", self.getReadableContent(rhs),
-                                  "%.2f%%" % (100 * conf), "%.2f%%" % (100 * supp)))
-                print tabulate(table, headers=["LHS", "", "RHS", "Confidence", "Support"], tablefmt="grid")
+            print >> f, "==%s itemsets (min_sup=%.2f%%)" % (ITEMSETS[self.itemsets], 100 * self.threshold)
+            sortedSets = sorted(self.frequentSets.items(), key=operator.itemgetter(1), reverse=True)
+            table = ((",".join(map(self.getReadableContent, s)), count, '%.2f%%' % (count*100/float(self.totalSize))) for s, count in sortedSets)
+            print >> f, tabulate(table, headers=["ItemSets", "Count", "Support"], tablefmt="grid",
+                                 coltypes=[str, int, str], plain=True)
+
+            print >> f, "\n\n==High-confidence association rules (min_conf=%.2f%%)" % (100 * self.confidence)
+            measures = self.ruleMeasures if self.measures else [()] * len(self.assocrules)
+            sortedRules = sorted(zip(self.assocrules, measures), key=lambda r: r[0][2], reverse=True)
+            table = []
+            for (lhs, rhs, conf, supp), values in sortedRules:
+                l = map(self.getReadableContent, lhs)
+                table.append((",".join(l), "=>", ",".join(map(self.getReadableContent, rhs)),
+                              "%.2f%%" % (100 * conf), "%.2f%%" % (100 * supp)) + tuple(values))
+            headers = ["LHS", "", "RHS", "Confidence", "Support"] + [TITLES[m] for m in self.measures]
+            print >> f, tabulate(table, headers=headers, tablefmt="grid", floatfmt=".3f", plain=True,
+                                 coltypes=[str] * 5 + [float] * len(self.measures))
+
+    def writeOutput(self, output_file, format="csv", rules=None, width=40):
+        """ streams the frequent itemsets and the association rules to the
+            output file in one of the WRITERS formats, unsorted and without
+            holding the rows. rules are (rule, measure values) pairs, by
+            default the built rules, or e.g. measureRules(iterAssociationRules())
+            to write them as they are generated """
+        if rules is None:
+            rules = izip(self.assocrules, self.ruleMeasures if self.measures else repeat(()))
+        total = float(self.totalSize)
+        with open(output_file, "w") as f:
+            writer = WRITERS[format](f, width)
+            writer.section("%s itemsets" % ITEMSETS[self.itemsets], ITEMSET_COLUMNS)
+            for s, count in self.frequentSets.iteritems():
+                writer.write((",".join(map(self.getReadableContent, s)), count, count / total))
+            writer.section("association rules", RULE_COLUMNS + [(m, float) for m in self.measures])
+            for (lhs, rhs, conf, supp), values in rules:
+                writer.write((",".join(map(self.getReadableContent, lhs)),
+                              ",".join(map(self.getReadableContent, rhs)), conf, supp) + tuple(values))
+            writer.close()
 
 ### Main driver
 if __name__ == "__main__":
-    filename = raw_input("File (leave blank to use INTEGRATED_DATASET.csv): ").strip()
-    threshold = float(raw_input("Enter support(0.07): "))
+    parser = argparse.ArgumentParser(description="Mine association rules from a csv file")
+    parser.add_argument("--schema", default=None,
+                        help="json config of the table, columns and items to load "
+                             "(inferred from the csv header by default)")
+    parser.add_argument("--items", nargs="+", default=None,
+                        help="csv headers of the categorical columns to mine, when inferring the schema")
+    parser.add_argument("--miner", choices=MINERS, default="apriori",
+                        help="algorithm used to mine the frequent itemsets")
+    parser.add_argument("--engine", choices=["sql"] + sorted(ENGINES), default="sql",
+                        help="engine used to count the support of candidate itemsets")
+    parser.add_argument("--diffsets", action="store_true",
+                        help="use diffsets instead of tid-lists with the eclat miner")
+    parser.add_argument("--memory-limit", type=int, default=None,
+                        help="bytes of tid-lists the eclat miner may hold before recomputing them")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes of the parallel engine (defaults to the cpu count)")
+    parser.add_argument("--chunk-size", type=int, default=100000,
+                        help="rows per chunk read by the son miner")
+    parser.add_argument("--batch-size", type=int, default=10000,
+                        help="rows inserted per executemany call when loading the csv file")
+    parser.add_argument("--prepare", action="store_true",
+                        help="index the table and materialize (tid, item) pairs for the sql engine")
+    parser.add_argument("--use-prepared", choices=PREPARED, default="dictionary",
+                        help="how the tables of an earlier --prepare run are used: only for the item "
+                             "ids, not at all, or also to count itemsets by intersecting tids")
+    parser.add_argument("--columnar", default=None,
+                        help="memory-mapped columnar cache of the mined columns, written when "
+                             "missing or older than the csv file and read instead of sqlite")
+    parser.add_argument("--incremental", default=None, metavar="STATE",
+                        help="keep data.db between runs and update the itemsets saved in this state file, "
+                             "counting only the rows appended since the last run")
+    parser.add_argument("--append", default=None, metavar="CSV",
+                        help="csv file whose rows are appended to the table before mining")
+    parser.add_argument("--results", default=None, metavar="DB",
+                        help="sqlite store of mined results, runs at a higher support or confidence "
+                             "than a stored one are answered from it without mining")
+    parser.add_argument("--consequents", type=int, default=1,
+                        help="largest number of items on the right hand side of the rules")
+    parser.add_argument("--measures", nargs="+", choices=MEASURES, default=[],
+                        help="interestingness measures of the rules to show in the output")
+    parser.add_argument("--min", nargs=2, action="append", default=[], metavar=("MEASURE", "VALUE"),
+                        help="keep only the rules whose measure is above the value, may be repeated")
+    parser.add_argument("--format", choices=["table"] + sorted(WRITERS), default="table",
+                        help="output format: the sorted table, or rows streamed unsorted as a grid "
+                             "of bounded width, csv, json lines or columnar row groups")
+    parser.add_argument("--output", default="output.txt", help="file the itemsets and rules are written to")
+    parser.add_argument("--width", type=int, default=40,
+                        help="width of the text columns of the grid format, longer values are truncated")
+    parser.add_argument("--itemsets", choices=sorted(ITEMSETS), default="all",
+                        help="keep all the frequent itemsets, or only the closed or maximal ones")
+    top = parser.add_mutually_exclusive_group()
+    top.add_argument("--top-itemsets", type=int, default=None, metavar="K",
+                     help="mine the K most frequent itemsets instead of using a support threshold")
+    top.add_argument("--top-rules", type=int, default=None, metavar="K",
+                     help="mine the K most frequent rules above the confidence instead of using "
+                          "a support threshold")
+    args = parser.parse_args()
+    topK = args.top_itemsets or args.top_rules
+    minMeasures = {}
+    for name, value in args.min:
+        if name not in MEASURES:
+            parser.error("--min takes one of the measures %s" % ", ".join(MEASURES))
+        minMeasures[name] = float(value)
+    if args.itemsets != "all" and (topK or args.incremental):
+        parser.error("closed and maximal itemsets cannot be mined incrementally or as the top k")
+
+    filename = raw_input("File (leave blank to use INTEGRATED-DATASET.csv): ").strip()
+    threshold = 0.0 if topK else float(raw_input("Enter support(0.07): "))
     confidence = float(raw_input("Enter confidence(0.5): "))
 
-    if filename and filename != "INTEGRATED_DATASET.csv":
-        print "Please use the integrated dataset to run this program"
-        sys.exit()
-
-    createDatabase("INTEGRATED-DATASET.csv")
-    apriori = Apriori(dbfile="data.db", dbname="school", confidence=confidence, threshold=threshold,
-                      categories=["overall_grade", "env_grade", "perf_grade", "progress_grade"])
-    apriori.generateFrequentItemSets()
-    apriori.buildAssociationRules()
-    apriori.generateOutput("output.txt")
-    print "Rules and frequent itemsets generated in output.txt"
+    if args.items and (args.schema or not filename or filename == "INTEGRATED-DATASET.csv"):
+        parser.error("--items picks the columns of an inferred schema, it cannot be used with "
+                     "--schema or INTEGRATED-DATASET.csv")
+    if not filename or filename == "INTEGRATED-DATASET.csv":
+        filename = "INTEGRATED-DATASET.csv"
+        schema = loadSchema(args.schema or "schema.json")
+    elif args.schema:
+        schema = loadSchema(args.schema)
+    else:
+        try:
+            schema = inferSchema(filename, items=args.items)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # sqlite is only needed by the sql engine and the son miner once the columnar cache is current
+    usesDatabase = args.prepare or args.miner == "son" or (args.miner == "apriori" and args.engine == "sql")
+    # an existing table is only mined incrementally if it was created with the schema
+    # and still holds the rows counted in the state file, otherwise it is rebuilt
+    if args.incremental and tableMatches(schema) and \
+            readState(args.incremental, schema.table, schema.items) is not None:
+        print "Mining %s from the existing %s table" % (", ".join(schema.items), schema.table)
+    elif args.columnar and not usesDatabase and isCurrent(args.columnar, filename, schema.table, schema.items):
+        print "Mining %s from the columnar cache %s" % (", ".join(schema.items), args.columnar)
+    else:
+        schema, count, rate = createDatabase(filename, schema, args.batch_size, columnar=args.columnar)
+        print "Loaded %d rows into %s (%d rows/sec), mining %s" % (count, schema.table, rate,
+                                                                  ", ".join(schema.items))
+    if args.append:
+        count, rate = appendFile(args.append, schema, args.batch_size)
+        print "Appended %d rows to %s (%d rows/sec)" % (count, schema.table, rate)
+    if args.prepare:
+        prepareDatabase(schema)
+    apriori = Apriori(dbfile="data.db", dbname=schema.table, confidence=confidence, threshold=threshold,
+                      categories=schema.items,
+                      engine=args.engine, miner=args.miner, diffsets=args.diffsets,
+                      memoryLimit=args.memory_limit, workers=args.workers,
+                      chunkSize=args.chunk_size,
+                      columnar=None if args.incremental or args.append else args.columnar,
+                      itemsets=args.itemsets, consequents=args.consequents,
+                      measures=args.measures, minMeasures=minMeasures, prepared=args.use_prepared)
+    # the store holds complete runs only, and top-k runs have no support to look it up with
+    useStore = args.results and args.itemsets == "all"
+    loaded = None
+    if useStore:
+        store, datasetFingerprint = ResultStore(args.results), fingerprint(apriori)
+    if useStore and not topK:
+        loaded = store.load(apriori, datasetFingerprint)
+        if loaded is not None:
+            print "Frequent itemsets%s loaded from %s" % (" and rules" if loaded else "", args.results)
+    if loaded is None:
+        if topK:
+            apriori.generateTopItemSets(topK, rules=args.top_rules is not None)
+            print "Support raised to %d rows (%.2f%%)" % (apriori.support, 100 * apriori.threshold)
+        elif args.incremental:
+            incremental = IncrementalMiner(apriori, args.incremental)
+            incremental.run()
+            print "Saved the mining state in %s, %d itemsets were recounted on the old rows" \
+                % (args.incremental, incremental.rescanned)
+        else:
+            apriori.generateFrequentItemSets()
+        for size, candidates, queries, elapsed in apriori.levelStats:
+            print "Level %d: %d candidates counted with %d queries in %.3fs" % (size, candidates, queries, elapsed)
+    # rules filtered on their measures are not all the rules of the run
+    saving = useStore and loaded is None and not minMeasures
+    rules = None
+    if not loaded:
+        if args.format == "table" or saving:
+            apriori.buildAssociationRules()
+        else:
+            # the rules are written as they are generated, without keeping them
+            rules = apriori.measureRules(apriori.iterAssociationRules())
+    if saving:
+        store.save(apriori, datasetFingerprint)
+    if args.format == "table":
+        apriori.generateOutput(args.output)
+    else:
+        apriori.writeOutput(args.output, args.format, rules, args.width)
+    apriori.close()
+    print "Rules and frequent itemsets generated in %s" % args.output
@@ -0,0 +1,200 @@
+#!/usr/bin/python
+"""
+Benchmarks for the Apriori implementation. Run with
+
+    $ ./benchmark.py --rows 1000 10000 100000 --output benchmark.json
+
+to time every stage of mining synthetic tables of these sizes with each
+counting engine and miner, or with
+
+    $ ./benchmark.py --candidates
+
+to compare the candidate joins of getNextCandidates.
+"""
+import os
+import csv
+import json
+import math
+import random
+import shutil
+import tempfile
+import time
+import argparse
+from bisect import bisect
+from itertools import combinations
+from apriori import Apriori, ENGINES, MINERS
+from dataloader import Schema, createDatabase
+
+def legacyNextCandidates(apriori, candidates, size=2):
+    # the original all-pairs join of getNextCandidates, kept as a reference
+    possibleCombs = [reduce(lambda x, y: x.union(y), c) for c in combinations(candidates, 2)]
+    validSets = [c for c in possibleCombs if apriori.hasUniqueCategories(c) and len(c) == size]
+    newCandidates = []
+    for s in validSets:
+        isValid = True
+        for x in combinations(s, len(s)-1):
+            if set(x) not in candidates:
+                isValid = False
+                continue
+        if isValid and s not in newCandidates:
+            newCandidates.append(s)
+    return newCandidates
+
+def syntheticLevel(columns, values, size, count, seed=0):
+    # returns an Apriori instance knowing columns*values items, and count
+    # random itemsets of size-1 items taken from distinct columns
+    rng = random.Random(seed)
+    apriori = Apriori.__new__(Apriori)
+    apriori.items = [("col%d" % c, chr(65 + v)) for c in range(columns) for v in range(values)]
+    level = set()
+    while len(level) < count:
+        cols = rng.sample(range(columns), size - 1)
+        level.add(frozenset(c * values + rng.randrange(values) for c in cols))
+    return apriori, [set(s) for s in level]
+
+def timed(fn, *args):
+    start = time.time()
+    result = fn(*args)
+    return result, time.time() - start
+
+def benchCandidates(sizes=(100, 200, 400), columns=12, values=3, size=3):
+    # compares the prefix join of getNextCandidates with the all-pairs join
+    print "getNextCandidates, %d columns with %d values, building C%d" % (columns, values, size)
+    print "%8s %10s %10s %9s" % ("|Lk-1|", "all-pairs", "prefix", "speedup")
+    for count in sizes:
+        apriori, level = syntheticLevel(columns, values, size, count)
+        old, oldTime = timed(legacyNextCandidates, apriori, level, size)
+        new, newTime = timed(apriori.getNextCandidates, level, size)
+        assert set(map(frozenset, old)) == set(map(frozenset, new))
+        print "%8d %9.3fs %9.3fs %8.1fx" % (count, oldTime, newTime, oldTime / max(newTime, 1e-6))
+
+def poisson(rng, mean):
+    # Knuth's method, fine for the small means of the pattern sizes
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+def questRows(transactions, columns=8, cardinality=4, patterns=20, patternSize=4,
+              correlation=0.5, corruption=0.5, seed=0):
+    """ generates rows of categorical values in the style of the IBM Quest
+    generator of the Agrawal and Srikant paper. Every pattern of a pool sets
+    the values of a Poisson distributed number of columns, a fraction
+    correlation of them taken from the previous pattern, and has an
+    exponentially distributed weight and a corruption level around
+    corruption. A row follows a pattern picked by weight, losing each of its
+    values with the probability of its corruption level, and takes uniform
+    random values in the remaining columns """
+    rng = random.Random(seed)
+    pool, previous = [], {}
+    for _ in range(patterns):
+        size = max(1, min(columns, poisson(rng, patternSize)))
+        kept = rng.sample(sorted(previous), min(len(previous), int(round(correlation * size))))
+        pattern = dict((c, previous[c]) for c in kept)
+        for c in rng.sample([c for c in range(columns) if c not in pattern], size - len(pattern)):
+            pattern[c] = rng.randrange(cardinality)
+        pool.append((rng.expovariate(1), pattern, min(1.0, max(0.0, rng.gauss(corruption, 0.1)))))
+        previous = pattern
+    cumulative, total = [], 0.0
+    for weight, _, _ in pool:
+        total += weight
+        cumulative.append(total)
+    for _ in xrange(transactions):
+        _, pattern, level = pool[min(bisect(cumulative, rng.random() * total), len(pool) - 1)]
+        row = [pattern[c] if c in pattern and rng.random() >= level else rng.randrange(cardinality)
+               for c in range(columns)]
+        yield ["v%d" % v for v in row]
+
+def writeQuest(filename, transactions, columns=8, **options):
+    # writes a synthetic csv file and returns the schema mining all its columns
+    names = ["col%d" % c for c in range(columns)]
+    with open(filename, "wb") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(questRows(transactions, columns, **options))
+    return Schema("quest", [(name, name, "TEXT") for name in names], names)
+
+def benchStages(rows, runs, threshold=0.05, confidence=0.5, directory=None, **options):
+    """ times every stage of mining a synthetic table of rows transactions
+    with each (engine, miner) pair of runs, and returns one record per run """
+    directory = directory or tempfile.mkdtemp(prefix="apriori-benchmark-")
+    filename, dbfile = os.path.join(directory, "quest.csv"), os.path.join(directory, "benchmark.db")
+    schema = writeQuest(filename, rows, **options)
+    records = []
+    try:
+        (_, count, _), loadTime = timed(lambda: createDatabase(filename, schema, dbfile=dbfile))
+        for engine, miner in runs:
+            stages = {"createDatabase": loadTime}
+            apriori, elapsed = timed(Apriori, dbfile, schema.table, schema.items,
+                                     threshold, confidence, engine, miner)
+            # the item mapping and the engine are built by the constructor, which times them
+            stages.update(apriori.timings)
+            stages["init"] = elapsed - sum(apriori.timings.values())
+            _, stages["generateFrequentItemSets"] = timed(apriori.generateFrequentItemSets)
+            _, stages["buildAssociationRules"] = timed(apriori.buildAssociationRules)
+            _, stages["generateOutput"] = timed(apriori.generateOutput, os.path.join(directory, "output.txt"))
+            records.append({"rows": count, "engine": engine, "miner": miner, "threshold": threshold,
+                            "confidence": confidence, "options": options, "stages": stages,
+                            "levels": [{"level": level, "candidates": candidates, "queries": queries,
+                                        "seconds": elapsed}
+                                       for level, candidates, queries, elapsed in apriori.levelStats],
+                            "itemsets": len(apriori.frequentSets), "rules": len(apriori.assocrules),
+                            "queries": apriori.queries})
+            apriori.close()
+    finally:
+        shutil.rmtree(directory)
+    return records
+
+def printStages(record):
+    stages = record["stages"]
+    print "%9d %-9s %-9s %9d %7d" % (record["rows"], record["engine"], record["miner"],
+                                     record["itemsets"], record["rules"]),
+    print " ".join("%9.3fs" % stages[s] for s in STAGES)
+
+# the timed stages, in the order they run
+STAGES = ("createDatabase", "init", "initMapping", "loadEngine", "generateFrequentItemSets",
+          "buildAssociationRules", "generateOutput")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the stages of Apriori on synthetic data")
+    parser.add_argument("--candidates", action="store_true",
+                        help="compare the candidate joins of getNextCandidates instead")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                        help="numbers of transactions of the synthetic tables")
+    parser.add_argument("--columns", type=int, default=8, help="categorical columns of the tables")
+    parser.add_argument("--cardinality", type=int, default=4, help="distinct values per column")
+    parser.add_argument("--patterns", type=int, default=20, help="patterns the rows are drawn from")
+    parser.add_argument("--pattern-size", type=float, default=4, help="mean number of columns a pattern sets")
+    parser.add_argument("--correlation", type=float, default=0.5,
+                        help="fraction of the columns of a pattern taken from the previous one")
+    parser.add_argument("--corruption", type=float, default=0.5,
+                        help="mean probability for a row to lose each value of its pattern")
+    parser.add_argument("--support", type=float, default=0.05)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--engines", nargs="+", choices=["sql"] + sorted(ENGINES),
+                        default=["sql"] + sorted(ENGINES), help="engines the apriori miner is run with")
+    parser.add_argument("--miners", nargs="+", choices=MINERS, default=list(MINERS),
+                        help="miners to run, the other ones than apriori with the sql engine")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="json file the records are written to")
+    args = parser.parse_args()
+
+    if args.candidates:
+        benchCandidates()
+    else:
+        runs = [(engine, "apriori") for engine in args.engines if "apriori" in args.miners] + \
+               [("sql", miner) for miner in args.miners if miner != "apriori"]
+        print "%9s %-9s %-9s %9s %7s" % ("rows", "engine", "miner", "itemsets", "rules"),
+        print " ".join("%10s" % s[:10] for s in STAGES)
+        records = []
+        for rows in args.rows:
+            for record in benchStages(rows, runs, args.support, args.confidence, columns=args.columns,
+                                      cardinality=args.cardinality, patterns=args.patterns,
+                                      patternSize=args.pattern_size, correlation=args.correlation,
+                                      corruption=args.corruption, seed=args.seed):
+                printStages(record)
+                records.append(record)
+        with open(args.output, "w") as f:
+            json.dump(records, f, indent=2)
+        print "Records written to %s" % args.output
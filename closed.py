@@ -0,0 +1,97 @@
+"""
+Closed and maximal frequent itemsets. The closed itemsets, those without a
+superset of the same count, are mined depth-first from the item bitmaps with
+the tid-list properties of CHARM (Zaki and Hsiao), which merge the items that
+always occur together instead of enumerating their combinations. They are a
+lossless summary: the count of any frequent itemset is the highest count of
+the closed itemsets containing it. The maximal ones, without any frequent
+superset, are the closed itemsets not contained in another one.
+"""
+from counters import popcount
+
+class Charm(object):
+    """ Mines every closed itemset with a support count of at least minCount
+    from a mapping of items to their transaction bitmaps """
+    def __init__(self, bitmaps, minCount):
+        self.bitmaps = bitmaps
+        self.minCount = minCount
+        self.closed = {}
+
+    def run(self):
+        members = [(frozenset([v]), b, popcount(b)) for v, b in self.bitmaps.iteritems()]
+        members = [m for m in members if m[2] >= self.minCount]
+        members.sort(key=lambda m: (m[2], min(m[0])))
+        self.extend(members)
+        return dict((tuple(sorted(items)), count) for items, count in self.closed.itervalues())
+
+    def extend(self, members):
+        # mines a class of (itemset, bitmap, support) triples, removing the members
+        # whose tid-list turns out to be contained in the one of an earlier member
+        i = 0
+        while i < len(members):
+            items, bits, support = members[i]
+            children = []
+            j = i + 1
+            while j < len(members):
+                other, otherBits, otherSupport = members[j]
+                childBits = bits & otherBits
+                childSupport = popcount(childBits)
+                if childSupport < self.minCount:
+                    j += 1
+                elif childSupport == support:
+                    # other occurs wherever items does, so it joins the itemset
+                    items = items | other
+                    if childSupport == otherSupport:
+                        del members[j]
+                    else:
+                        j += 1
+                else:
+                    # the children only hold the items they add, as items may still grow
+                    children.append((other, childBits, childSupport))
+                    if childSupport == otherSupport:
+                        del members[j]
+                    else:
+                        j += 1
+            if children:
+                self.extend([(items | other, b, s) for other, b, s in children])
+            self.addClosed(items, bits, support)
+            i += 1
+
+    def addClosed(self, items, bits, support):
+        # itemsets sharing a tid-list share their closure, which is their union
+        if bits in self.closed:
+            items = items | self.closed[bits][0]
+        self.closed[bits] = (items, support)
+
+def charm(bitmaps, minCount):
+    """ returns the closed itemsets with a support count of at least
+    minCount, mapped to their counts """
+    return Charm(bitmaps, minCount).run()
+
+class ClosedSets(object):
+    """ The closed itemsets along with an index of the closed itemsets
+    containing every item, from which the count of any frequent itemset and
+    the maximal itemsets are derived on demand """
+    def __init__(self, closed):
+        self.closed = closed
+        self.sets = closed.keys()
+        self.index = {}
+        for i, s in enumerate(self.sets):
+            for v in s:
+                self.index.setdefault(v, set()).add(i)
+
+    def supersets(self, itemset):
+        # positions of the closed itemsets containing itemset
+        lists = sorted((self.index.get(v, set()) for v in itemset), key=len)
+        if not lists:
+            return set(range(len(self.sets)))
+        return lists[0].intersection(*lists[1:])
+
+    def count(self, itemset):
+        # the count of a frequent itemset, 0 when it is not frequent
+        return max([self.closed[self.sets[i]] for i in self.supersets(itemset)] or [0])
+
+    def maximal(self):
+        # the closed itemsets that no other closed itemset contains
+        return dict((s, count) for s, count in self.closed.iteritems()
+                    if len(self.supersets(s)) == 1)
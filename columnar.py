@@ -0,0 +1,92 @@
+"""
+On-disk columnar cache of the mined columns of a table. Every column is
+dictionary-encoded into the item ids used by Apriori and stored as a raw
+array of int32 (-1 for NULL), after a small json header holding the item
+dictionary. The file is opened through mmap, so the arrays are read without
+copying them and concurrent mining jobs on the same host share the pages.
+The arrays can equally be opened with numpy.memmap(path, dtype="<i4",
+offset=store.offsets[i], shape=(store.rows,)).
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import ctypes
+import sqlite3
+import struct
+from itertools import izip
+
+MAGIC = "APRCOL1\n"
+ALIGNMENT = 8
+
+def fileStamp(filename):
+    # identifies the version of the source csv a cache was built from
+    stat = os.stat(filename)
+    return {"path": os.path.abspath(filename), "size": stat.st_size, "mtime": stat.st_mtime}
+
+def writeColumnar(path, table, columns, dbfile='data.db', source=None):
+    """ writes the columns of a table to a columnar cache file, one column at
+    a time so that memory stays bounded by the item dictionary """
+    conn = sqlite3.connect(dbfile)
+    c = conn.cursor()
+    items = []
+    for col in columns:
+        values = c.execute("select distinct %s from %s" % (col, table)).fetchall()
+        items.extend(sorted((col, v[0]) for v in values if v[0] is not None))
+    itemIds = dict((item, i) for i, item in enumerate(items))
+    rows = c.execute("select count(*) from %s" % table).fetchone()[0]
+    header = json.dumps({"table": table, "columns": columns, "items": items, "rows": rows,
+                         "byteorder": sys.byteorder, "source": source})
+    start = len(MAGIC) + 8 + len(header)
+    padding = -start % ALIGNMENT
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header) + padding))
+        f.write(header + " " * padding)
+        for col in columns:
+            values = c.execute("select %s from %s order by rowid" % (col, table))
+            while True:
+                batch = values.fetchmany(65536)
+                if not batch:
+                    break
+                array.array("i", [itemIds[(col, v[0])] if v[0] is not None else -1
+                                  for v in batch]).tofile(f)
+    conn.close()
+
+def isCurrent(path, filename, table, columns):
+    # checks whether a cache of these columns exists and was built from the current csv file
+    if not os.path.exists(path):
+        return False
+    store = ColumnarStore(path)
+    return store.source == fileStamp(filename) and store.table == table and \
+        list(store.columns) == list(columns)
+
+class ColumnarStore(object):
+    """ Read access to a columnar cache file, every column is a ctypes int32
+    array mapped over the file pages """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("%s is not a columnar cache file" % path)
+            size = struct.unpack("<Q", f.read(8))[0]
+            header = json.loads(f.read(size))
+            # a private mapping is writable for ctypes but never written to,
+            # so the pages stay shared with the page cache
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("%s was written with a different byte order" % path)
+        self.table = header["table"]
+        self.columns = header["columns"]
+        self.items = [tuple(item) for item in header["items"]]
+        self.rows = header["rows"]
+        self.source = header["source"]
+        start = len(MAGIC) + 8 + size
+        self.offsets = [start + 4 * self.rows * i for i in range(len(self.columns))]
+        self.arrays = [(ctypes.c_int32 * self.rows).from_buffer(self.mmap, offset)
+                       for offset in self.offsets]
+
+    def iterRows(self):
+        # streams the sorted item ids of every row
+        for row in izip(*self.arrays):
+            yield tuple(v for v in row if v >= 0)
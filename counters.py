@@ -0,0 +1,116 @@
+import binascii
+import multiprocessing
+from itertools import combinations
+
+def popcount(bitmap):
+    # number of set bits in a python long
+    return bin(bitmap).count("1")
+
+def countTransactions(transactions, keys):
+    # counts the sorted item tuples in keys in a single pass over the transactions
+    counts = dict.fromkeys(keys, 0)
+    sizes = set(map(len, keys))
+    for row in transactions:
+        for k in sizes:
+            for comb in combinations(row, k):
+                if comb in counts:
+                    counts[comb] += 1
+    return [counts[k] for k in keys]
+
+def toBitmap(tids, size):
+    # packs a list of transaction ids into a python long, bit i set for tid i
+    bits = bytearray((size + 7) // 8)
+    for tid in tids:
+        bits[tid >> 3] |= 1 << (tid & 7)
+    bits.reverse()
+    return int(binascii.hexlify(bits) or "0", 16)
+
+class BitmapCounter(object):
+    """ Vertical counting engine. The categorical columns are loaded once
+    and every item keeps a bitmap of the transactions it appears in, so the
+    support of an itemset is the popcount of the intersection of its bitmaps
+    """
+    def __init__(self, apriori):
+        tidlists = {}
+        size = 0
+        for tid, row in enumerate(apriori.loadTransactions()):
+            for v in row:
+                tidlists.setdefault(v, []).append(tid)
+            size = tid + 1
+        self.bitmaps = dict((v, toBitmap(tids, size)) for v, tids in tidlists.iteritems())
+
+    def count(self, values):
+        # returns the support count of an itemset e.g. count((0, 7))
+        bitmap = None
+        for v in values:
+            if v not in self.bitmaps:
+                return 0
+            bitmap = self.bitmaps[v] if bitmap is None else bitmap & self.bitmaps[v]
+        return popcount(bitmap) if bitmap is not None else 0
+
+    def countCandidates(self, candidates):
+        # returns the support counts of a list of itemsets, in order
+        return [self.count(c) for c in candidates]
+
+class ScanCounter(object):
+    """ Horizontal counting engine. Every candidate of a level is counted
+    in a single pass over the transactions, by looking up the k-combinations
+    of each row in a dict keyed by sorted item id tuples
+    """
+    def __init__(self, apriori):
+        self.transactions = apriori.loadTransactions()
+
+    def count(self, values):
+        # returns the support count of an itemset e.g. count((0, 7))
+        return self.countCandidates([values])[0]
+
+    def countCandidates(self, candidates):
+        # returns the support counts of a list of itemsets, in order
+        return countTransactions(self.transactions, [tuple(sorted(c)) for c in candidates])
+
+# partitions of the transactions handed to the worker processes
+_partitions = None
+
+def _initWorker(partitions):
+    global _partitions
+    _partitions = partitions
+
+def _countPartition(args):
+    index, keys = args
+    return countTransactions(_partitions[index], keys)
+
+class ParallelCounter(object):
+    """ Counting engine that splits the transactions into one row partition
+    per worker. The process pool is started once, with the partitions, and
+    counts every level: each worker gets the candidates of the level once and
+    the partial counts are summed up. close() stops the workers
+    """
+    def __init__(self, apriori):
+        transactions = apriori.loadTransactions()
+        self.workers = apriori.workers or multiprocessing.cpu_count()
+        size = max(1, -(-len(transactions) // self.workers))
+        self.partitions = [transactions[i:i+size] for i in range(0, len(transactions), size)]
+        self.pool = None
+        if self.partitions:
+            self.pool = multiprocessing.Pool(min(self.workers, len(self.partitions)),
+                                             _initWorker, (self.partitions,))
+
+    def count(self, values):
+        # returns the support count of an itemset e.g. count((0, 7)), in process
+        key = [tuple(sorted(values))]
+        return sum(countTransactions(p, key)[0] for p in self.partitions)
+
+    def countCandidates(self, candidates):
+        # returns the support counts of a list of itemsets, in order
+        keys = [tuple(sorted(c)) for c in candidates]
+        if not keys or not self.partitions:
+            return [0] * len(keys)
+        partials = self.pool.map(_countPartition, [(i, keys) for i in range(len(self.partitions))])
+        return [sum(counts) for counts in zip(*partials)]
+
+    def close(self):
+        # stops the worker processes
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
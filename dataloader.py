@@ -1,39 +1,261 @@
 import sqlite3
 import csv
 import os
+import re
+import json
+import time
+from itertools import islice
+from columnar import writeColumnar, fileStamp
 
-def readFile(filename):
-    conn = sqlite3.connect('data.db')
-    c = conn.cursor()
+# pragmas applied while bulk loading, they trade durability for speed since
+# the database can always be rebuilt from the csv file
+PRAGMAS = {"journal_mode": "MEMORY", "synchronous": "OFF", "cache_size": -65536}
+
+# rows sampled when inferring the schema of a csv file
+SAMPLE_SIZE = 1000
+
+# text columns with at most this many distinct values in the sample are items
+MAX_CARDINALITY = 50
+
+# the sqlite keywords, and the names of the rowid, which inferred column names
+# must not take as they are used unquoted in the queries
+RESERVED = frozenset("""
+    abort action add after all alter always analyze and as asc attach autoincrement before
+    begin between by cascade case cast check collate column commit conflict constraint create
+    cross current current_date current_time current_timestamp database default deferrable
+    deferred delete desc detach distinct do drop each else end escape except exclude exclusive
+    exists explain fail filter first following for foreign from full generated glob group
+    groups having if ignore immediate in index indexed initially inner insert instead intersect
+    into is isnull join key last left like limit match materialized natural no not nothing
+    notnull null nulls of offset on or order others outer over partition plan pragma preceding
+    primary query raise range recursive references regexp reindex release rename replace
+    restrict returning right rollback row rows savepoint select set table temp temporary then
+    ties to transaction trigger unbounded union unique update using vacuum values view virtual
+    when where window with without rowid oid _rowid_
+""".split())
+
+class Schema(object):
+    """ Describes how a csv file is loaded into a table: the name, csv header
+    and sql type of every loaded column, and which of the columns hold the
+    categorical items that are mined """
+    def __init__(self, table, columns, items):
+        self.table = table
+        self.columns = columns # list of (name, header, type)
+        self.items = items
+        names = [name for name, _, _ in columns]
+        for item in items:
+            if item not in names:
+                raise ValueError("Item column %r is not one of the loaded columns" % item)
+
+    def names(self):
+        return [name for name, _, _ in self.columns]
+
+    def toJSON(self):
+        return {"table": self.table, "items": self.items,
+                "columns": [{"name": name, "header": header, "type": type_}
+                            for name, header, type_ in self.columns]}
+
+    @classmethod
+    def fromJSON(cls, config):
+        columns = [(c["name"], c.get("header", c["name"]), c.get("type", "TEXT"))
+                   for c in config["columns"]]
+        return cls(config["table"], columns, config["items"])
+
+def loadSchema(configFile):
+    # reads a schema from a json config file
+    with open(configFile) as f:
+        return Schema.fromJSON(json.load(f))
+
+def columnName(header, taken=()):
+    # turns a csv header like "2009-2010 OVERALL GRADE" into a sql column name,
+    # suffixing the reserved words and numbering the names already taken
+    name = re.sub(r"[^0-9a-z]+", "_", header.lower()).strip("_") or "column"
+    name = "c" + name if name[0].isdigit() else name
+    if name in RESERVED:
+        name += "_"
+    unique, i = name, 2
+    while unique in taken:
+        unique, i = "%s_%d" % (name, i), i + 1
+    return unique
+
+def valueType(value):
+    for type_, conv in (("INTEGER", int), ("REAL", float)):
+        try:
+            conv(value)
+            return type_
+        except ValueError:
+            pass
+    return "TEXT"
+
+def inferSchema(filename, table="transactions", items=None, maxCardinality=MAX_CARDINALITY):
+    """ infers a schema from the header and the first rows of a csv file. The
+    item columns are the given csv headers, or else every text column with at
+    most maxCardinality distinct values. Only the item columns are loaded """
     with open(filename) as f:
         reader = csv.reader(f, delimiter=',')
-        for (index, row) in enumerate(reader):
-            if index:
-                addInTable(row, c)
-    conn.commit()
-    conn.close()
+        headers = next(reader)
+        sample = list(islice(reader, SAMPLE_SIZE))
+    missing = [h for h in items or [] if h not in headers]
+    if missing:
+        raise ValueError("Columns %s not found in %s" % (", ".join(missing), filename))
+    columns = []
+    for i, header in enumerate(headers):
+        values = set(row[i] for row in sample if i < len(row) and row[i])
+        types = set(map(valueType, values))
+        type_ = "TEXT" if "TEXT" in types else "REAL" if "REAL" in types else "INTEGER"
+        isItem = header in items if items is not None else \
+            type_ == "TEXT" and 0 < len(values) <= maxCardinality
+        if isItem:
+            columns.append((columnName(header, [name for name, _, _ in columns]), header, type_))
+    if not columns:
+        raise ValueError("No categorical columns found in %s" % filename)
+    return Schema(table, columns, [name for name, _, _ in columns])
 
-def addInTable(row, c):
-    truncated_row = filter(len, row)
-    if len(truncated_row) == 6:
-        c.execute('INSERT INTO school VALUES (?, ?, ?, ?, ?, ?)', truncated_row)
+def readRows(filename, schema):
+    # streams the fields of the schema columns from the rows of the csv file
+    with open(filename) as f:
+        reader = csv.reader(f, delimiter=',')
+        headers = next(reader)
+        missing = [h for _, h, _ in schema.columns if h not in headers]
+        if missing:
+            raise ValueError("Columns %s not found in %s" % (", ".join(missing), filename))
+        indexes = [headers.index(h) for _, h, _ in schema.columns]
+        for row in reader:
+            yield [row[i] if i < len(row) else "" for i in indexes]
 
-def setup():
-    conn = sqlite3.connect('data.db')
+def cleanRows(rows):
+    # keeps the complete rows only
+    for row in rows:
+        if all(row):
+            yield row
+
+def batches(rows, batchSize):
+    # groups the rows into lists of at most batchSize rows
+    while True:
+        batch = list(islice(rows, batchSize))
+        if not batch:
+            return
+        yield batch
+
+def applyPragmas(conn, pragmas):
+    c = conn.cursor()
+    for name, value in sorted(pragmas.iteritems()):
+        c.execute("PRAGMA %s = %s" % (name, value))
+
+def readFile(filename, schema, batchSize=10000, pragmas=PRAGMAS, dbfile='data.db'):
+    """ loads the schema columns of the csv file into its table with batched
+    executemany calls inside a single transaction, in constant memory.
+    Returns the number of rows loaded and the rows per second """
+    start = time.time()
+    conn = sqlite3.connect(dbfile)
+    applyPragmas(conn, pragmas)
+    insert = 'INSERT INTO %s VALUES (%s)' % (schema.table, ", ".join("?" * len(schema.columns)))
+    count = 0
+    with conn:
+        c = conn.cursor()
+        for batch in batches(cleanRows(readRows(filename, schema)), batchSize):
+            c.executemany(insert, batch)
+            count += len(batch)
+    conn.close()
+    elapsed = time.time() - start
+    return count, count / elapsed if elapsed else float(count)
+
+def setup(schema, dbfile='data.db'):
+    # creates the table of the schema, and records its columns in schema_columns
+    conn = sqlite3.connect(dbfile)
     c = conn.cursor()
-    c.execute('''CREATE TABLE school
-                (dbn TEXT, peer_index REAL, overall_grade TEXT,
-                 env_grade TEXT, perf_grade TEXT, progress_grade TEXT)''')
+    c.execute('CREATE TABLE %s (%s)' % (schema.table, ", ".join(
+        "%s %s" % (name, type_) for name, _, type_ in schema.columns)))
+    c.execute('''CREATE TABLE IF NOT EXISTS schema_columns
+                (tbl TEXT, name TEXT, header TEXT, type TEXT, item INTEGER)''')
+    c.executemany('INSERT INTO schema_columns VALUES (?, ?, ?, ?, ?)',
+                  [(schema.table, name, header, type_, int(name in schema.items))
+                   for name, header, type_ in schema.columns])
     conn.commit()
     conn.close()
 
-def createDatabase(filename):
-    try:
-        setup()
-    except sqlite3.OperationalError:
-        os.remove('data.db')
-        setup()
-        readFile(filename)
+def readSchema(table, dbfile='data.db'):
+    # returns the schema a table was created with
+    conn = sqlite3.connect(dbfile)
+    rows = conn.cursor().execute('SELECT name, header, type, item FROM schema_columns '
+                                 'WHERE tbl = ? ORDER BY rowid', (table,)).fetchall()
+    conn.close()
+    return Schema(table, [tuple(r[:3]) for r in rows], [r[0] for r in rows if r[3]])
+
+def prepareDatabase(schema, dbfile='data.db'):
+    """ optional preparation for the sql counting backend: indexes every item
+    column, and materializes the items of every row as (tid, item) pairs in
+    <table>_items with a covering index, next to the <table>_dictionary of
+    item ids. Apriori detects these tables and reads its item ids from the
+    dictionary, and with prepared="intersect" counts support from the pairs """
+    conn = sqlite3.connect(dbfile)
+    with conn:
+        c = conn.cursor()
+        for col in schema.items:
+            c.execute('CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)' % (schema.table, col, schema.table, col))
+        c.execute('DROP TABLE IF EXISTS %s_dictionary' % schema.table)
+        c.execute('DROP TABLE IF EXISTS %s_items' % schema.table)
+        c.execute('CREATE TABLE %s_dictionary (item INTEGER PRIMARY KEY, col TEXT, value)' % schema.table)
+        c.execute('CREATE TABLE %s_items (tid INTEGER, item INTEGER)' % schema.table)
+        # ids are handed out column by column from 0, like Apriori.initMapping does
+        items = []
+        for col in schema.items:
+            values = c.execute('SELECT DISTINCT %s FROM %s WHERE %s IS NOT NULL'
+                               % (col, schema.table, col)).fetchall()
+            items.extend(sorted((col, v[0]) for v in values))
+        c.executemany('INSERT INTO %s_dictionary VALUES (?, ?, ?)' % schema.table,
+                      [(i, col, value) for i, (col, value) in enumerate(items)])
+        c.execute('CREATE INDEX %s_dictionary_col_value ON %s_dictionary (col, value)'
+                  % (schema.table, schema.table))
+        for col in schema.items:
+            c.execute('INSERT INTO %s_items SELECT t.rowid, d.item FROM %s t JOIN %s_dictionary d '
+                      'ON d.col = ? AND d.value = t.%s' % (schema.table, schema.table, schema.table, col), (col,))
+        c.execute('CREATE INDEX %s_items_item_tid ON %s_items (item, tid)' % (schema.table, schema.table))
+    conn.close()
+
+def tableMatches(schema, dbfile='data.db'):
+    # checks that the table of the schema exists and was created with its
+    # columns and items, as recorded in schema_columns
+    if not tableExists(schema.table, dbfile) or not tableExists("schema_columns", dbfile):
+        return False
+    recorded = readSchema(schema.table, dbfile)
+    return recorded.columns == list(schema.columns) and recorded.items == list(schema.items)
+
+def tableExists(table, dbfile='data.db'):
+    if not os.path.exists(dbfile):
+        return False
+    conn = sqlite3.connect(dbfile)
+    found = conn.cursor().execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (table,)).fetchone()
+    conn.close()
+    return found is not None
+
+def appendFile(filename, schema, batchSize=10000, pragmas=PRAGMAS, dbfile='data.db'):
+    """ appends the rows of a csv file to the existing table of the schema,
+    dropping the prepared item tables that no longer match it. Returns the
+    rows loaded and the rows per second """
+    conn = sqlite3.connect(dbfile)
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS %s_items' % schema.table)
+        conn.execute('DROP TABLE IF EXISTS %s_dictionary' % schema.table)
+    conn.close()
+    return readFile(filename, schema, batchSize, pragmas, dbfile)
+
+def createDatabase(filename, schema=None, batchSize=10000, pragmas=PRAGMAS, dbfile='data.db',
+                   columnar=None):
+    """ rebuilds the database from the csv file, inferring the schema when
+    none is given, and writes the item columns to a columnar cache file when
+    a path is given. Returns the schema, the rows loaded and the rows per second """
+    if schema is None:
+        schema = inferSchema(filename)
+    if os.path.exists(dbfile):
+        os.remove(dbfile)
+    setup(schema, dbfile)
+    count, rate = readFile(filename, schema, batchSize, pragmas, dbfile)
+    if columnar:
+        writeColumnar(columnar, schema.table, schema.items, dbfile, fileStamp(filename))
+    return schema, count, rate
 
 if __name__ == '__main__':
-    createDatabase('INTEGRATED-DATASET.csv')
+    schema, count, rate = createDatabase('INTEGRATED-DATASET.csv', loadSchema('schema.json'))
+    print "Loaded %d rows into %s (%d rows/sec)" % (count, schema.table, rate)
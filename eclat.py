@@ -0,0 +1,86 @@
+"""
+Depth-first Eclat miner (Zaki) working on vertical tid-lists, stored as
+bitmaps in python longs. With diffsets enabled every class below the first
+level keeps the difference between the tid-list of its prefix and its own,
+which stays small on dense data. When the bitmaps held by the open prefix
+classes exceed memoryLimit bytes, new classes keep no bitmaps at all and the
+supports are recomputed from the item bitmaps instead.
+"""
+from counters import popcount
+
+# representations of the bitmaps stored in a prefix class
+TIDSET, DIFFSET, NONE = "tidset", "diffset", "none"
+
+def sizeOf(bitmap):
+    # approximate number of bytes taken by a bitmap
+    return (bitmap.bit_length() + 7) // 8 if bitmap else 0
+
+class Eclat(object):
+    """ Mines every itemset with a support count of at least minCount from
+    a mapping of items to their transaction bitmaps """
+    def __init__(self, bitmaps, minCount, diffsets=False, memoryLimit=None):
+        self.bitmaps = bitmaps
+        self.minCount = minCount
+        self.diffsets = diffsets
+        self.memoryLimit = memoryLimit
+        self.held = 0
+        self.result = {}
+
+    def run(self):
+        members = [(v, b, popcount(b)) for v, b in self.bitmaps.iteritems()]
+        members = [m for m in members if m[2] >= self.minCount]
+        # least frequent items first keeps the intersections small
+        members.sort(key=lambda m: (m[2], m[0]))
+        self.extend((), members, TIDSET)
+        return self.result
+
+    def tidset(self, itemset):
+        # recomputes the tid-list of an itemset from the item bitmaps
+        bitmap = None
+        for v in itemset:
+            bitmap = self.bitmaps[v] if bitmap is None else bitmap & self.bitmaps[v]
+        return bitmap
+
+    def extend(self, prefix, members, mode):
+        # mines the prefix class whose members are (item, bitmap, support) triples
+        for i, (item, bits, support) in enumerate(members):
+            itemset = prefix + (item,)
+            self.result[tuple(sorted(itemset))] = support
+            if i + 1 == len(members):
+                continue
+            localMode = mode
+            if mode == NONE:
+                # the class kept no bitmaps, the tid-lists are recomputed
+                bits, localMode = self.tidset(itemset), TIDSET
+            if self.memoryLimit is not None and self.held >= self.memoryLimit:
+                childMode = NONE
+            elif self.diffsets or localMode == DIFFSET:
+                childMode = DIFFSET
+            else:
+                childMode = TIDSET
+            children = []
+            for other, otherBits, otherSupport in members[i + 1:]:
+                if mode == NONE:
+                    otherBits = self.tidset(prefix + (other,))
+                if localMode == DIFFSET:
+                    childBits = otherBits & ~bits
+                elif childMode == DIFFSET:
+                    childBits = bits & ~otherBits
+                else:
+                    childBits = bits & otherBits
+                if localMode == DIFFSET or childMode == DIFFSET:
+                    childSupport = support - popcount(childBits)
+                else:
+                    childSupport = popcount(childBits)
+                if childSupport >= self.minCount:
+                    children.append((other, childBits if childMode != NONE else None, childSupport))
+            if children:
+                size = sum(sizeOf(c[1]) for c in children)
+                self.held += size
+                self.extend(itemset, children, childMode)
+                self.held -= size
+
+def eclat(bitmaps, minCount, diffsets=False, memoryLimit=None):
+    """ returns all itemsets with a support count of at least minCount,
+    mapped to their counts """
+    return Eclat(bitmaps, minCount, diffsets, memoryLimit).run()
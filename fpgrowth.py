@@ -0,0 +1,93 @@
+"""
+FP-Growth (Han et al.) miner used as an alternative to the level-wise
+candidate generation of the Apriori class. The transactions are compressed
+into a prefix tree in two scans, after which the frequent itemsets are mined
+recursively from conditional trees without generating any candidates.
+"""
+
+class FPNode(object):
+    """ A node of the FP-tree, linked to its parent so that the prefix
+    paths of an item can be walked back to the root """
+    __slots__ = ("item", "count", "parent", "children")
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+class FPTree(object):
+    """ Prefix tree of transactions together with the header table that
+    links every node holding the same item """
+    def __init__(self):
+        self.root = FPNode(None, None)
+        self.headers = {}
+
+    def insert(self, items, count=1):
+        # adds a transaction whose items are already sorted in tree order
+        node = self.root
+        for item in items:
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = FPNode(item, node)
+                self.headers.setdefault(item, []).append(child)
+            child.count += count
+            node = child
+
+    def prefixPaths(self, item):
+        # returns the conditional pattern base of an item as (path, count) pairs
+        paths = []
+        for node in self.headers[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            if path:
+                path.reverse()
+                paths.append((path, node.count))
+        return paths
+
+def buildTree(patterns, minCount):
+    # builds a tree from (items, count) patterns, keeping the frequent items only
+    counts = {}
+    for items, count in patterns:
+        for item in items:
+            counts[item] = counts.get(item, 0) + count
+    tree = FPTree()
+    for items, count in patterns:
+        items = [i for i in items if counts[i] >= minCount]
+        if items:
+            tree.insert(items, count)
+    return tree
+
+def mineTree(tree, suffix, minCount, result):
+    # recursively mines the itemsets that end with suffix from a (conditional) tree
+    for item, nodes in tree.headers.iteritems():
+        support = sum(node.count for node in nodes)
+        if support < minCount:
+            continue
+        itemset = (item,) + suffix
+        result[tuple(sorted(itemset))] = support
+        conditional = buildTree(tree.prefixPaths(item), minCount)
+        if conditional.headers:
+            mineTree(conditional, itemset, minCount, result)
+
+def fpgrowth(scan, minCount):
+    """ returns all itemsets with a support count of at least minCount,
+    mapped to their counts. scan is a callable returning a fresh iterator
+    over the transactions, it is called exactly twice """
+    counts = {}
+    for row in scan():
+        for v in row:
+            counts[v] = counts.get(v, 0) + 1
+    # order the items by descending count so that common prefixes are shared
+    rank = dict((v, i) for i, v in enumerate(sorted(counts, key=lambda v: (-counts[v], v))))
+    tree = FPTree()
+    for row in scan():
+        items = sorted((v for v in row if counts[v] >= minCount), key=rank.get)
+        if items:
+            tree.insert(items)
+    result = {}
+    mineTree(tree, (), minCount, result)
+    return result
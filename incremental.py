@@ -0,0 +1,108 @@
+"""
+Incremental mining in the spirit of FUP (Cheung et al.) for tables that
+only grow. The counts of the frequent itemsets of the last run, and of the
+negative border (the candidates that turned out infrequent), are saved in a
+json state file along with the last rowid mined. The next run counts the
+candidates on the appended rows only, and rescans the old rows just for
+the candidates whose old count is unknown and that could now reach the
+support threshold. The frequent itemsets are the same as a full re-run's.
+"""
+import os
+import json
+import sqlite3
+from counters import countTransactions
+
+def readState(path, table, columns, dbfile="data.db"):
+    """ returns the state saved in path if it was saved for these columns of
+    the table, and the rows it counted are still the first rows of the table,
+    or None when the table was rebuilt or replaced since """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if state["table"] != table or state["columns"] != list(columns):
+        return None
+    conn = sqlite3.connect(dbfile)
+    counted = conn.cursor().execute("select count(*) from %s where rowid <= ?" % table,
+                                    (state["watermark"],)).fetchone()[0]
+    conn.close()
+    return state if counted == state["totalSize"] else None
+
+class IncrementalMiner(object):
+    """ Fills the frequentSets of an Apriori instance, reusing and then
+    updating the state saved in path by the previous run """
+    def __init__(self, apriori, path):
+        self.apriori = apriori
+        self.path = path
+        self.rescanned = 0
+
+    def run(self):
+        watermark = self.apriori.runFetchOne("select max(rowid) from %s" % self.apriori.dbname)[0] or 0
+        state = self.load()
+        if state is None:
+            self.apriori.generateFrequentItemSets()
+            counts = self.apriori.supportCache
+        else:
+            counts = self.update(state, watermark)
+        self.save(counts, watermark)
+
+    def load(self):
+        # returns the saved state, if it was saved for the same rows and threshold
+        a = self.apriori
+        state = readState(self.path, a.dbname, a.columns, a.dbfile)
+        if state is None or state["threshold"] != a.threshold:
+            return None
+        return state
+
+    def save(self, counts, watermark):
+        a = self.apriori
+        state = {"table": a.dbname, "columns": list(a.columns), "threshold": a.threshold,
+                 "support": a.support, "totalSize": a.totalSize, "watermark": watermark,
+                 "counts": [[[a.items[v] for v in sorted(s)], count] for s, count in counts.iteritems()]}
+        with open(self.path, "w") as f:
+            json.dump(state, f)
+
+    def readRows(self, clause, rowid):
+        # streams the encoded rows of the table matching a condition on the rowid
+        a = self.apriori
+        c = a.conn.cursor()
+        a.queries += 1
+        query = "select %s from %s where %s" % (", ".join(a.columns), a.dbname, clause)
+        for row in c.execute(query, (rowid,)):
+            yield a.encodeRow(row)
+
+    def update(self, state, watermark):
+        # mines level by level, counting the candidates on the appended rows
+        a = self.apriori
+        known = {}
+        for items, count in state["counts"]:
+            known[frozenset(a.itemIds[tuple(item)] for item in items)] = count
+        delta = list(self.readRows("rowid > ?", state["watermark"]))
+        oldSupport = state["support"]
+        counts = {}
+        candidateSet = [(v,) for v in range(len(a.items))]
+        currentSize = 2
+        while len(candidateSet):
+            keys = [tuple(sorted(c)) for c in candidateSet]
+            rescan = []
+            for key, deltaCount in zip(keys, countTransactions(delta, keys)):
+                s = frozenset(key)
+                if s in known:
+                    counts[s] = known[s] + deltaCount
+                # every itemset missing from the state was below the old support,
+                # it only needs its old count if it can now reach the new one
+                elif oldSupport == 0 or oldSupport - 1 + deltaCount >= a.support:
+                    rescan.append((key, deltaCount))
+            if rescan:
+                self.rescanned += len(rescan)
+                oldCounts = countTransactions(self.readRows("rowid <= ?", state["watermark"]),
+                                              [key for key, _ in rescan])
+                for (key, deltaCount), oldCount in zip(rescan, oldCounts):
+                    counts[frozenset(key)] = oldCount + deltaCount
+            frequentSet = dict((key, counts[frozenset(key)]) for key in keys
+                               if counts.get(frozenset(key), -1) >= a.support)
+            a.addFrequentItemSets(frequentSet)
+            candidateSet = a.getNextCandidates(frequentSet.keys(), currentSize)
+            currentSize += 1
+        a.supportCache.update(counts)
+        return counts
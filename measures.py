@@ -0,0 +1,43 @@
+"""
+Interestingness measures of association rules, computed from the counts of
+the itemsets of a rule X => Y: the rule itself, its lhs X, its rhs Y and the
+most frequent single item of X u Y. A batch of rules is computed at once,
+over numpy arrays when numpy is installed and over plain floats otherwise.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# the measures in output order, with their column titles
+MEASURES = ("lift", "leverage", "conviction", "kulczynski", "allconf")
+TITLES = {"lift": "Lift", "leverage": "Leverage", "conviction": "Conviction",
+          "kulczynski": "Kulczynski", "allconf": "All-confidence"}
+
+# every formula takes the supports of the rule, lhs, rhs and top item, and a
+# division returning infinity for a zero denominator
+FORMULAS = {
+    "lift": lambda xy, x, y, top, div: div(xy, x * y),
+    "leverage": lambda xy, x, y, top, div: xy - x * y,
+    "conviction": lambda xy, x, y, top, div: div(x - x * y, x - xy),
+    "kulczynski": lambda xy, x, y, top, div: (div(xy, x) + div(xy, y)) / 2,
+    "allconf": lambda xy, x, y, top, div: div(xy, top),
+}
+
+def divide(a, b):
+    return a / b if b else float("inf")
+
+def arrayDivide(a, b):
+    nonzero = b != 0
+    return numpy.where(nonzero, a / numpy.where(nonzero, b, 1), numpy.inf)
+
+def computeMeasures(names, counts, total):
+    """ returns a tuple with the values of the named measures for every rule
+    of a batch, given a list of (rule, lhs, rhs, top item) count tuples """
+    total = float(total)
+    if numpy is not None and counts:
+        xy, x, y, top = (numpy.array(counts, dtype=float) / total).T
+        columns = [FORMULAS[name](xy, x, y, top, arrayDivide) for name in names]
+        return map(tuple, numpy.column_stack(columns).tolist())
+    return [tuple(FORMULAS[name](xy / total, x / total, y / total, top / total, divide)
+                  for name in names) for xy, x, y, top in counts]
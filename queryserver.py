@@ -0,0 +1,153 @@
+#!/usr/bin/python
+"""
+Long-lived rule query service. The frequent itemsets are mined, or loaded
+from a results store, once at startup and every rule they yield is indexed
+by item, by column and by consequent, sorted by confidence, lift and
+support. Requests are answered from these indexes without running
+buildAssociationRules again. It reads one json request per line on stdin
+and writes one json response per line on stdout, e.g.
+
+    {"rhs": "overall_grade = A", "min_confidence": 0.8}
+    {"rhs": "overall_grade", "by": "lift", "top": 5}
+    {"involving": "env_grade", "by": "lift", "top": 5}
+    {"itemsets": true, "involving": "perf_grade = C", "top": 3}
+"""
+import sys
+import json
+import time
+import argparse
+from bisect import bisect_left
+from apriori import Apriori
+from dataloader import loadSchema, tableMatches, createDatabase
+from results import ResultStore, fingerprint
+
+# orderings the rules can be requested in
+METRICS = ("confidence", "lift", "support")
+
+class RuleIndex(object):
+    """ Indexes the rules of every frequent itemset of an Apriori instance """
+    def __init__(self, apriori):
+        self.apriori = apriori
+        total = float(apriori.totalSize)
+        counts = apriori.frequentSets
+        self.itemsets = sorted(counts.iteritems(), key=lambda x: -x[1])
+        self.rules = []
+        for s, count in counts.iteritems():
+            if len(s) < 2:
+                continue
+            for rhs in s:
+                lhs = tuple(v for v in s if v != rhs)
+                conf = float(count) / counts[lhs]
+                self.rules.append((lhs, rhs, conf, conf * total / counts[(rhs,)], count / total))
+        self.names = dict((apriori.getReadableContent(v), v) for v in range(len(apriori.items)))
+        # every key is an item id, a column name, or None for all the rules
+        self.ruleLists = {}
+        self.itemsetLists = {}
+        for i, (lhs, rhs, _, _, _) in enumerate(self.rules):
+            for key in set(lhs + (rhs,) + tuple(apriori.items[v][0] for v in lhs + (rhs,)) + (None,)):
+                self.ruleLists.setdefault(key, []).append(i)
+            # consequents are indexed by item and by column
+            self.ruleLists.setdefault(("rhs", rhs), []).append(i)
+            self.ruleLists.setdefault(("rhs", apriori.items[rhs][0]), []).append(i)
+        for i, (s, _) in enumerate(self.itemsets):
+            for key in set(s + tuple(apriori.items[v][0] for v in s) + (None,)):
+                self.itemsetLists.setdefault(key, []).append(i)
+        # the rule lists are kept sorted on every metric, by descending value
+        self.sorted = {}
+        for key, indexes in self.ruleLists.iteritems():
+            for m, metric in enumerate(METRICS):
+                ordered = sorted(indexes, key=lambda i: -self.rules[i][2 + m])
+                self.sorted[key, metric] = (ordered, [-self.rules[i][2 + m] for i in ordered])
+
+    def key(self, name):
+        # turns "column = value" into an item id, anything else is a column name
+        return self.names.get(name, name)
+
+    def formatRule(self, i):
+        lhs, rhs, conf, lift, supp = self.rules[i]
+        readable = self.apriori.getReadableContent
+        return {"lhs": map(readable, lhs), "rhs": readable(rhs),
+                "confidence": conf, "lift": lift, "support": supp}
+
+    def queryRules(self, request):
+        if "rhs" in request:
+            key = ("rhs", self.key(request["rhs"]))
+        else:
+            key = self.key(request.get("involving"))
+        by = request.get("by", "confidence")
+        if by not in METRICS:
+            raise ValueError("by must be one of %s" % ", ".join(METRICS))
+        ordered, values = self.sorted.get((key, by), ([], []))
+        # the list is sorted on the requested metric, so its minimum cuts it with a bisection
+        if "min_" + by in request:
+            ordered = ordered[:bisect_left(values, -request["min_" + by])]
+        mins = [(2 + m, request["min_" + metric]) for m, metric in enumerate(METRICS)
+                if metric != by and "min_" + metric in request]
+        top = request.get("top", 10)
+        found = []
+        for i in ordered:
+            if all(self.rules[i][f] > value for f, value in mins):
+                found.append(self.formatRule(i))
+                if len(found) == top:
+                    break
+        return {"rules": found}
+
+    def queryItemsets(self, request):
+        total = float(self.apriori.totalSize)
+        minSupport = request.get("min_support", 0)
+        top = request.get("top", 10)
+        found = []
+        for i in self.itemsetLists.get(self.key(request.get("involving")), []):
+            s, count = self.itemsets[i]
+            if count / total < minSupport:
+                break
+            found.append({"items": map(self.apriori.getReadableContent, s), "count": count,
+                          "support": count / total})
+            if len(found) == top:
+                break
+        return {"itemsets": found}
+
+    def query(self, request):
+        start = time.time()
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a json object")
+        if request.get("itemsets"):
+            response = self.queryItemsets(request)
+        else:
+            response = self.queryRules(request)
+        response["elapsed_ms"] = 1000 * (time.time() - start)
+        return response
+
+def serve(index, requests=sys.stdin, responses=sys.stdout):
+    # answers json requests line by line until the input is closed
+    for line in iter(requests.readline, ""):
+        if not line.strip():
+            continue
+        try:
+            response = index.query(json.loads(line))
+        except (ValueError, TypeError, KeyError) as e:
+            response = {"error": str(e)}
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer rule queries over precomputed itemsets")
+    parser.add_argument("--schema", default="schema.json", help="json schema of the mined table")
+    parser.add_argument("--csv", default="INTEGRATED-DATASET.csv",
+                        help="csv file the table is loaded from when data.db does not hold it with the schema")
+    parser.add_argument("--support", type=float, default=0.01,
+                        help="support threshold of the itemsets the rules are built from")
+    parser.add_argument("--results", default=None, metavar="DB",
+                        help="results store to load the itemsets from instead of mining")
+    args = parser.parse_args()
+
+    schema = loadSchema(args.schema)
+    if not tableMatches(schema):
+        createDatabase(args.csv, schema)
+    apriori = Apriori(dbfile="data.db", dbname=schema.table, categories=schema.items,
+                      threshold=args.support, confidence=0.0)
+    if args.results is None or ResultStore(args.results).load(apriori, fingerprint(apriori)) is None:
+        apriori.generateFrequentItemSets()
+    index = RuleIndex(apriori)
+    sys.stderr.write("Indexed %d itemsets and %d rules\n" % (len(index.itemsets), len(index.rules)))
+    serve(index)
@@ -0,0 +1,95 @@
+"""
+SQLite store of mined results, keyed by a fingerprint of the mined columns
+of the dataset and by the support threshold. Anything frequent at a higher
+support is among the itemsets stored for a lower one, so a later run with a
+higher support or confidence is answered by filtering the stored itemsets
+and rules, without mining again.
+"""
+import json
+import hashlib
+import sqlite3
+from itertools import islice
+
+def fingerprint(apriori):
+    # hashes the table name, the mined columns, the item dictionary and the
+    # encoded rows, from sqlite or from the columnar cache alike
+    digest = hashlib.sha1(json.dumps([apriori.dbname, list(apriori.columns), apriori.items]))
+    rows = apriori.iterTransactions()
+    while True:
+        batch = list(islice(rows, 10000))
+        if not batch:
+            break
+        digest.update(repr(batch))
+    return digest.hexdigest()
+
+def encode(itemset):
+    return ",".join(map(str, sorted(itemset)))
+
+def decode(text):
+    return tuple(map(int, text.split(","))) if text else ()
+
+class ResultStore(object):
+    """ Saves the frequent itemsets and rules of Apriori runs, and loads them
+    back into an Apriori instance for any higher support or confidence """
+    def __init__(self, path="results.db"):
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS runs
+                (id INTEGER PRIMARY KEY, fingerprint TEXT, threshold REAL, support INTEGER,
+                 confidence REAL, consequents INTEGER, total INTEGER, items TEXT)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS itemsets
+                (run INTEGER, items TEXT, count INTEGER)''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS rules
+                (run INTEGER, lhs TEXT, rhs TEXT, count INTEGER, confidence REAL)''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS runs_fingerprint ON runs (fingerprint, support)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS itemsets_run ON itemsets (run, count)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS rules_run ON rules (run, count)')
+
+    def save(self, apriori, fingerprint):
+        # stores the itemsets and rules of a run, the item ids are saved along
+        # with the dictionary that decodes them
+        with self.conn:
+            c = self.conn.cursor()
+            c.execute('INSERT INTO runs (fingerprint, threshold, support, confidence, consequents, total, items) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                      (fingerprint, apriori.threshold, apriori.support, apriori.confidence,
+                       apriori.consequents, apriori.totalSize, json.dumps(apriori.items)))
+            run = c.lastrowid
+            c.executemany('INSERT INTO itemsets VALUES (?, ?, ?)',
+                          [(run, encode(s), count) for s, count in apriori.frequentSets.iteritems()])
+            c.executemany('INSERT INTO rules VALUES (?, ?, ?, ?, ?)',
+                          [(run, encode(lhs), encode(rhs), apriori.getCount(tuple(lhs) + tuple(rhs))[0], conf)
+                           for lhs, rhs, conf, supp in apriori.assocrules])
+
+    def findRun(self, fingerprint, support):
+        # returns the stored run of the dataset with the highest support not above support
+        return self.conn.cursor().execute(
+            'SELECT id, confidence, consequents, items FROM runs WHERE fingerprint = ? AND support <= ? '
+            'ORDER BY support DESC, confidence ASC LIMIT 1', (fingerprint, support)).fetchone()
+
+    def load(self, apriori, fingerprint):
+        """ fills the frequent itemsets of apriori from a stored run, and its
+        rules too when the stored run used a confidence no higher and rhs of
+        as many items. Returns None when no stored run applies, or else
+        whether the rules were loaded """
+        found = self.findRun(fingerprint, apriori.support)
+        if found is None:
+            return None
+        run, confidence, consequents, items = found
+        # stored ids are translated through their (column, value) pairs
+        ids = [apriori.itemIds[tuple(item)] for item in json.loads(items)]
+        translate = lambda text: tuple(sorted(ids[v] for v in decode(text)))
+        c = self.conn.cursor()
+        frequentSets = {}
+        for text, count in c.execute('SELECT items, count FROM itemsets WHERE run = ? AND count >= ?',
+                                     (run, apriori.support)):
+            frequentSets[translate(text)] = count
+        apriori.addFrequentItemSets(frequentSets)
+        if confidence > apriori.confidence or consequents < apriori.consequents:
+            return False
+        rows = c.execute('SELECT lhs, rhs, count, confidence FROM rules '
+                         'WHERE run = ? AND count >= ? AND confidence > ?',
+                         (run, apriori.support, apriori.confidence))
+        apriori.addAssociationRules((translate(lhs), translate(rhs), conf, float(count) / apriori.totalSize)
+                                    for lhs, rhs, count, conf in rows if len(decode(rhs)) <= apriori.consequents)
+        return True
@@ -0,0 +1,91 @@
+"""
+Two-phase partitioned miner based on the SON algorithm (Savasere, Omiecinski
+and Navathe), for tables that do not fit in memory. The table is read in
+chunks of rowids. Phase one mines every chunk with FP-Growth, using the
+support threshold scaled down to the size of the chunk, so that every
+globally frequent itemset is locally frequent in at least one chunk. Phase
+two counts the union of the local candidates in one more pass over the
+chunks, and keeps the ones that are frequent in the whole table.
+"""
+import sqlite3
+import multiprocessing
+from counters import countTransactions
+from fpgrowth import fpgrowth
+
+class ChunkReader(object):
+    """ Reads and encodes the categorical columns of a range of rowids """
+    def __init__(self, dbfile, dbname, columns, itemIds):
+        self.conn = sqlite3.connect(dbfile)
+        self.query = "select %s from %s where rowid >= ? and rowid < ?" % (", ".join(columns), dbname)
+        self.columns = columns
+        self.itemIds = itemIds
+
+    def read(self, chunk):
+        rows = self.conn.cursor().execute(self.query, chunk).fetchall()
+        return [tuple(self.itemIds[(col, v)] for col, v in zip(self.columns, row) if v is not None)
+                for row in rows]
+
+def getChunks(conn, dbname, chunkSize):
+    # splits the rowids of a table into [start, end) ranges of chunkSize rowids
+    low, high = conn.cursor().execute("select min(rowid), max(rowid) from %s" % dbname).fetchone()
+    if low is None:
+        return []
+    return [(start, start + chunkSize) for start in range(low, high + 1, chunkSize)]
+
+def mineChunk(reader, chunk, support, totalSize):
+    # phase one, returns the itemsets that are frequent within a chunk
+    transactions = reader.read(chunk)
+    # an itemset below support * len(chunk) / totalSize in every chunk is
+    # below support overall, so this local threshold misses nothing
+    minCount = max(1, -(-support * len(transactions) // totalSize))
+    return fpgrowth(lambda: iter(transactions), minCount)
+
+def countChunk(reader, chunk, keys):
+    # phase two, returns the counts of the candidates within a chunk
+    return countTransactions(reader.read(chunk), keys)
+
+# reader owned by each worker process of the pool
+_reader = None
+
+def _initWorker(dbfile, dbname, columns, itemIds):
+    global _reader
+    _reader = ChunkReader(dbfile, dbname, columns, itemIds)
+
+def _mineChunk(args):
+    return mineChunk(_reader, *args)
+
+def _countChunk(args):
+    return countChunk(_reader, *args)
+
+def son(dbfile, dbname, columns, itemIds, support, chunkSize, workers=None):
+    """ returns all itemsets of the table with a support count of at least
+    support, mapped to their counts. The chunks are mined and counted in a
+    process pool when more than one worker is requested """
+    reader = ChunkReader(dbfile, dbname, columns, itemIds)
+    totalSize = reader.conn.cursor().execute("select count(*) from %s" % dbname).fetchone()[0]
+    chunks = getChunks(reader.conn, dbname, chunkSize)
+    if not chunks:
+        return {}
+    support = max(support, 1)
+    if workers and workers > 1:
+        pool = multiprocessing.Pool(workers, _initWorker, (dbfile, dbname, columns, itemIds))
+        mapper = pool.map
+        mine, count = _mineChunk, _countChunk
+    else:
+        pool = None
+        mapper = map
+        mine = lambda args: mineChunk(reader, *args)
+        count = lambda args: countChunk(reader, *args)
+    try:
+        candidates = set()
+        for local in mapper(mine, [(chunk, support, totalSize) for chunk in chunks]):
+            candidates.update(local)
+        keys = sorted(candidates)
+        totals = [0] * len(keys)
+        for counts in mapper(count, [(chunk, keys) for chunk in chunks]):
+            totals = map(sum, zip(totals, counts))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return dict((k, c) for k, c in zip(keys, totals) if c >= support)
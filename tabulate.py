@@ -570,6 +570,36 @@ def _align_column(strings, alignment, minwidth=0, has_invisible=True):
     return padded_strings
 
 
+def _align_plain_column(strings, alignment, minwidth=0, valtype=None):
+    """_align_column for a column known to hold no invisible codes, measured
+    in one pass. The decimal points of int columns are not looked for.
+
+    >>> list(map(str,_align_plain_column(["12.345", "-1234.5", "1.23", "1234.5", "1e+234", "1.0e234"], "decimal")))
+    ['   12.345  ', '-1234.5    ', '    1.23   ', ' 1234.5    ', '    1e+234 ', '    1.0e234']
+
+    """
+    if alignment == "right":
+        strings = [s.strip() for s in strings]
+        fmt = "{0:>%ds}"
+    elif alignment == "center":
+        strings = [s.strip() for s in strings]
+        fmt = "{0:^%ds}"
+    elif alignment == "decimal":
+        if valtype is not int:
+            decimals = [_afterpoint(s) for s in strings]
+            maxdecimals = max(decimals)
+            strings = [s + (maxdecimals - decs) * " "
+                       for s, decs in zip(strings, decimals)]
+        fmt = "{0:>%ds}"
+    elif not alignment:
+        return strings
+    else:
+        strings = [s.strip() for s in strings]
+        fmt = "{0:<%ds}"
+    fmt = fmt % max(max(map(len, strings)), minwidth)
+    return [fmt.format(s) for s in strings]
+
+
 def _more_generic(type1, type2):
     types = { _none_type: 0, int: 1, float: 2, _binary_type: 3, _text_type: 4 }
     invtypes = { 4: _text_type, 3: _binary_type, 2: float, 1: int, 0: _none_type }
@@ -601,6 +631,24 @@ def _column_type(strings, has_invisible=True):
     return reduce(_more_generic, types, int)
 
 
+def _declared_type(strings, coltype):
+    """The column type of values declared by the caller to be of coltype,
+    found without trying to convert them. Text columns are binary when all
+    their values are.
+
+    >>> _declared_type([1, 2], int) is _int_type
+    True
+    >>> _declared_type(["1", "two"], _text_type) is _text_type
+    True
+
+    """
+    if coltype in (int, float):
+        return coltype
+    if all(isinstance(s, _binary_type) for s in strings):
+        return _binary_type
+    return _text_type
+
+
 def _format(val, valtype, floatfmt, missingval="", has_invisible=True):
     """Format a value accoding to its type.
 
@@ -814,7 +862,7 @@ def _normalize_tabular_data(tabular_data, headers, showindex="default"):
 
 def tabulate(tabular_data, headers=(), tablefmt="simple",
              floatfmt="g", numalign="decimal", stralign="left",
-             missingval="", showindex="default"):
+             missingval="", showindex="default", coltypes=None, plain=False):
     """Format a fixed width table for pretty printing.
 
     >>> print(tabulate([[1, 2.34], [-56, "8.999"], ["2", "10001"]]))
@@ -1058,6 +1106,19 @@ def tabulate(tabular_data, headers=(), tablefmt="simple",
      eggs & 451      \\\\
     \\bottomrule
     \end{tabular}
+
+    Large tables render faster when the caller already knows their columns.
+    `coltypes` declares the type of every column, one of int, float or a
+    string type, so that the values are not tried for conversions one by
+    one, and `plain=True` declares that no value holds ANSI color codes, so
+    that the widths are measured without stripping them. The output is the
+    same as with the types and codes found out:
+
+    >>> print(tabulate([["spam", 41.9999], ["eggs", 451.0]], coltypes=[str, float], plain=True))
+    ----  --------
+    spam   41.9999
+    eggs  451
+    ----  --------
     """
     if tabular_data is None:
         tabular_data = []
@@ -1066,10 +1127,12 @@ def tabulate(tabular_data, headers=(), tablefmt="simple",
 
     # optimization: look for ANSI control codes once,
     # enable smart width functions only if a control code is found
-    plain_text = '\n'.join(['\t'.join(map(_text_type, headers))] + \
-                            ['\t'.join(map(_text_type, row)) for row in list_of_lists])
-
-    has_invisible = re.search(_invisible_codes, plain_text)
+    if plain:
+        has_invisible = False
+    else:
+        plain_text = '\n'.join(['\t'.join(map(_text_type, headers))] + \
+                                ['\t'.join(map(_text_type, row)) for row in list_of_lists])
+        has_invisible = re.search(_invisible_codes, plain_text)
     enable_widechars = wcwidth is not None and WIDE_CHARS_MODE
     if has_invisible:
         width_fn = _visible_width
@@ -1080,15 +1143,22 @@ def tabulate(tabular_data, headers=(), tablefmt="simple",
 
     # format rows and columns, convert numeric values to strings
     cols = list(zip(*list_of_lists))
-    coltypes = list(map(_column_type, cols))
+    if coltypes is not None and cols:
+        coltypes = [_declared_type(c, ct) for c, ct in zip(cols, coltypes)]
+    else:
+        coltypes = list(map(_column_type, cols))
     cols = [[_format(v, ct, floatfmt, missingval, has_invisible) for v in c]
              for c,ct in zip(cols, coltypes)]
 
     # align columns
     aligns = [numalign if ct in [int,float] else stralign for ct in coltypes]
     minwidths = [width_fn(h) + MIN_PADDING for h in headers] if headers else [0]*len(cols)
-    cols = [_align_column(c, a, minw, has_invisible)
-            for c, a, minw in zip(cols, aligns, minwidths)]
+    if has_invisible or enable_widechars:
+        cols = [_align_column(c, a, minw, has_invisible)
+                for c, a, minw in zip(cols, aligns, minwidths)]
+    else:
+        cols = [_align_plain_column(c, a, minw, ct)
+                for c, a, minw, ct in zip(cols, aligns, minwidths, coltypes)]
 
     if headers:
         # align headers and add headers
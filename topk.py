@@ -0,0 +1,70 @@
+"""
+Top-k mining without a support threshold, in the spirit of TopKRules
+(Fournier-Viger et al.). The itemsets are searched best-first from the item
+bitmaps, the most frequent first, and the support bound is raised to the
+count of the k-th best result found so far, which prunes every extension
+below it. The search ends with every itemset reaching the final bound, so
+the result is the same as mining with that bound as the support threshold.
+"""
+import heapq
+from counters import popcount
+
+class TopK(object):
+    """ Finds the support bound of the k most frequent itemsets or, given a
+    confidence, of the k most frequent rules whose confidence is above it """
+    def __init__(self, bitmaps, k, confidence=None):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.bitmaps = bitmaps
+        self.k = k
+        self.confidence = confidence
+        self.minCount = 1
+        self.best = []
+        self.result = {}
+
+    def raiseBound(self, count):
+        # keeps the counts of the k best results, the smallest of them is the bound
+        heapq.heappush(self.best, count)
+        if len(self.best) > self.k:
+            heapq.heappop(self.best)
+        if len(self.best) == self.k:
+            self.minCount = max(self.minCount, self.best[0])
+
+    def rules(self, itemset, count):
+        # number of rules with a single item rhs above the confidence
+        found = 0
+        for x in itemset:
+            lhs = tuple(v for v in itemset if v != x)
+            if float(count) / self.result[lhs] > self.confidence:
+                found += 1
+        return found
+
+    def run(self):
+        items = sorted(self.bitmaps)
+        # ordered by count, then by size, so every subset is popped before its supersets
+        queue = [(-popcount(b), 1, (v,), b) for v, b in self.bitmaps.iteritems()]
+        heapq.heapify(queue)
+        while queue and -queue[0][0] >= self.minCount:
+            count, size, itemset, bits = heapq.heappop(queue)
+            count = -count
+            self.result[itemset] = count
+            if self.confidence is None:
+                self.raiseBound(count)
+            elif size > 1:
+                for _ in range(self.rules(itemset, count)):
+                    self.raiseBound(count)
+            for other in items:
+                if other <= itemset[-1]:
+                    continue
+                childBits = bits & self.bitmaps[other]
+                childCount = popcount(childBits)
+                if childCount >= self.minCount:
+                    heapq.heappush(queue, (-childCount, size + 1, itemset + (other,), childBits))
+        return dict((s, count) for s, count in self.result.iteritems() if count >= self.minCount), \
+            self.minCount
+
+def topk(bitmaps, k, confidence=None):
+    """ returns the itemsets reaching the support bound of the k most
+    frequent itemsets, or of the k most frequent rules above confidence
+    when it is given, mapped to their counts, along with the bound """
+    return TopK(bitmaps, k, confidence).run()
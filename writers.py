@@ -0,0 +1,122 @@
+"""
+Streaming writers for the frequent itemsets and the rules. Every row is
+written as soon as it is produced, so memory does not grow with the output.
+The output is made of sections, each declaring its columns as (name, type)
+pairs. The formats are csv, json lines, columnar row groups (one json line
+holding a list of values per column for every rowGroup rows) and a grid
+whose cells have a bounded width and are truncated instead of measured.
+"""
+import csv
+import json
+import math
+
+def jsonValue(value):
+    # json has no infinity nor nan, e.g. the conviction of a rule of 100%
+    # confidence, they are written as null
+    if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
+        return None
+    return value
+
+class CSVWriter(object):
+    """ Writes a header row at the start of every section, and every row
+    prefixed with the name of its section """
+    def __init__(self, f, width=None):
+        self.writer = csv.writer(f)
+        self.name = None
+
+    def section(self, name, columns):
+        self.name = name
+        self.writer.writerow(["section"] + [c for c, _ in columns])
+
+    def write(self, row):
+        self.writer.writerow([self.name] + [v.encode("utf-8") if isinstance(v, unicode) else v for v in row])
+
+    def close(self):
+        pass
+
+class JSONLWriter(object):
+    """ Writes every row as a json object keyed by the column names """
+    def __init__(self, f, width=None):
+        self.f = f
+        self.name, self.names = None, []
+
+    def section(self, name, columns):
+        self.name, self.names = name, [c for c, _ in columns]
+
+    def write(self, row):
+        record = dict(zip(self.names, map(jsonValue, row)))
+        record["section"] = self.name
+        self.f.write(json.dumps(record) + "\n")
+
+    def close(self):
+        pass
+
+class ColumnarWriter(object):
+    """ Buffers rowGroup rows of a section at most, and writes them as one
+    json line holding a list of values per column """
+    def __init__(self, f, width=None, rowGroup=10000):
+        self.f = f
+        self.rowGroup = rowGroup
+        self.name, self.names, self.rows = None, [], []
+
+    def section(self, name, columns):
+        self.flush()
+        self.name, self.names = name, [c for c, _ in columns]
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) == self.rowGroup:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        columns = dict((name, map(jsonValue, values)) for name, values in zip(self.names, zip(*self.rows)))
+        self.f.write(json.dumps({"section": self.name, "rows": len(self.rows), "columns": columns}) + "\n")
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+class GridWriter(object):
+    """ Writes a grid like the one of tabulate, with text columns width
+    characters wide and the other ones as wide as their header. Longer
+    values are truncated """
+    def __init__(self, f, width=40):
+        self.f = f
+        self.width = width
+        self.started = False
+
+    def section(self, name, columns):
+        if self.started:
+            self.f.write("\n\n")
+        self.started = True
+        self.types = [type_ for _, type_ in columns]
+        self.widths = [self.width if type_ is str else max(len(c), 10) for c, type_ in columns]
+        self.line = "+" + "+".join("-" * (w + 2) for w in self.widths) + "+\n"
+        self.f.write("==%s\n" % name)
+        self.f.write(self.line)
+        self.f.write(self.format(c for c, _ in columns))
+        self.f.write(self.line.replace("-", "="))
+
+    def cell(self, value, type_, width):
+        text = "%.4f" % value if type_ is float else value if isinstance(value, unicode) else str(value)
+        if len(text) > width:
+            text = text[:width - 3] + "..."
+        text = text.ljust(width) if type_ is str else text.rjust(width)
+        return text.encode("utf-8") if isinstance(text, unicode) else text
+
+    def format(self, row):
+        cells = [self.cell(v, str, w) for v, w in zip(row, self.widths)]
+        return "| " + " | ".join(cells) + " |\n"
+
+    def write(self, row):
+        cells = [self.cell(v, t, w) for v, t, w in zip(row, self.types, self.widths)]
+        self.f.write("| " + " | ".join(cells) + " |\n")
+        self.f.write(self.line)
+
+    def close(self):
+        pass
+
+# writers by output format
+WRITERS = {"csv": CSVWriter, "jsonl": JSONLWriter, "columnar": ColumnarWriter, "grid": GridWriter}